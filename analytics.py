@@ -0,0 +1,112 @@
+"""Vectorized aggregations over the answer log.
+
+Every function takes the history as one DataFrame (one row per event of
+``event_log``) and uses pandas group-bys only, so the cost grows with the
+number of structures shown rather than with a Python loop per answer.
+Rotated segments never change, so each one is parsed once and reused;
+only the active segment is re-read when it grows.
+"""
+
+import io
+import os
+from typing import Iterable, Tuple
+
+import pandas as pd
+
+from event_log import segment_paths
+
+COLUMNS = ["ts", "user", "bone", "number", "correct", "skipped", "latency", "matched"]
+
+# (path, size, mtime) of every segment: changes whenever an answer is logged
+HistoryVersion = Tuple[Tuple[str, int, int], ...]
+
+
+def history_version(directory: str) -> HistoryVersion:
+    """Return a key identifying the current content of the answer log."""
+    version = []
+    for path in segment_paths(directory):
+        try:
+            info = os.stat(path)
+        except FileNotFoundError:
+            continue
+        version.append((path, info.st_size, info.st_mtime_ns))
+    return tuple(version)
+
+
+def read_segment(path: str) -> pd.DataFrame:
+    """Parse one log segment into typed columns."""
+    with open(path, "rb") as f:
+        data = f.read()
+    # The writer may be appending: ignore a trailing partial line
+    data = data[:data.rfind(b"\n") + 1]
+    if not data:
+        return empty_history()
+    frame = pd.read_json(io.BytesIO(data), lines=True, dtype=False)
+    return typed_history(frame.reindex(columns=COLUMNS))
+
+
+def empty_history() -> pd.DataFrame:
+    return typed_history(pd.DataFrame(columns=COLUMNS))
+
+
+def typed_history(frame: pd.DataFrame) -> pd.DataFrame:
+    """Cast the log columns to compact dtypes."""
+    return frame.astype({
+        "ts": "float64", "user": "category", "bone": "category", "number": "int32",
+        "correct": "bool", "skipped": "bool", "latency": "float32", "matched": "Int32",
+    })
+
+
+def concat_history(frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate segments, keeping categorical columns categorical."""
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return empty_history()
+    for column in ("user", "bone"):
+        categories = pd.api.types.union_categoricals([frame[column] for frame in frames]).categories
+        frames = [frame.assign(**{column: frame[column].cat.set_categories(categories)}) for frame in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def accuracy_by_bone(history: pd.DataFrame) -> pd.DataFrame:
+    """Return answers, accuracy, skip rate and median latency per bone group."""
+    return history.groupby("bone", observed=True).agg(
+        answers=("correct", "size"),
+        accuracy=("correct", "mean"),
+        skipped=("skipped", "mean"),
+        latency=("latency", "median"),
+    ).sort_values("accuracy")
+
+
+def accuracy_by_structure(history: pd.DataFrame, min_answers: int = 1) -> pd.DataFrame:
+    """Return answers and accuracy per structure, hardest first."""
+    stats = history.groupby(["bone", "number"], observed=True).agg(
+        answers=("correct", "size"),
+        accuracy=("correct", "mean"),
+    )
+    stats = stats[stats["answers"] >= min_answers]
+    return stats.sort_values(["accuracy", "answers"], ascending=[True, False])
+
+
+def confusion_pairs(history: pd.DataFrame) -> pd.DataFrame:
+    """Return how often each structure was answered with another one, most frequent first."""
+    wrong = history[~history["correct"] & history["matched"].notna()]
+    wrong = wrong[wrong["matched"] != wrong["number"]]
+    pairs = wrong.groupby(["bone", "number", "matched"], observed=True).size().rename("count")
+    return pairs.sort_values(ascending=False).reset_index()
+
+
+def learning_curve(history: pd.DataFrame, bucket: int = 10) -> pd.DataFrame:
+    """Return the accuracy by attempt rank (per user), in buckets of ``bucket`` attempts."""
+    if history.empty:
+        return pd.DataFrame({"attempt": [], "accuracy": [], "users": []})
+    ordered = history.sort_values("ts", kind="stable")
+    attempt = ordered.groupby("user", observed=True).cumcount().to_numpy()
+    buckets = attempt // bucket * bucket + 1
+    curve = pd.DataFrame({"attempt": buckets, "correct": ordered["correct"].to_numpy(),
+                          "user": ordered["user"].to_numpy()})
+    return curve.groupby("attempt").agg(
+        accuracy=("correct", "mean"),
+        users=("user", "nunique"),
+    ).reset_index()
+
@@ -0,0 +1,94 @@
+"""Asset manifest: which catalog images are actually present on disk.
+
+The image folder is scanned once at startup, so rendering a view is a
+dictionary lookup instead of a filesystem check.
+
+Usage: python assets.py [--images images] [--catalog anatomical_data.json]
+prints the missing assets and exits with status 1 if any are missing.
+"""
+
+import argparse
+import os
+import sys
+from typing import Dict, List, NamedTuple
+
+from catalog import CATALOG_FILE, Catalog, load_catalog
+from image_pipeline import IMAGE_FOLDER, file_hash
+
+
+class AssetInfo(NamedTuple):
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+class AssetManifest:
+    """Image files available on disk and the catalog groups they leave incomplete."""
+
+    def __init__(self, image_folder: str, folder_exists: bool, files: Dict[str, AssetInfo], missing: Dict[str, List[str]]):
+        self.image_folder = image_folder
+        self.folder_exists = folder_exists
+        self.files = files
+        self.missing = missing
+
+    def has(self, image_file: str) -> bool:
+        """Return True if the image file exists in the image folder."""
+        return image_file in self.files
+
+    def is_complete(self, bone_group: str) -> bool:
+        """Return True if every view of the bone group has its image."""
+        return not self.missing.get(bone_group)
+
+    @property
+    def incomplete_groups(self) -> List[str]:
+        return [bone for bone, files in self.missing.items() if files]
+
+
+def scan_assets(catalog: Catalog, image_folder: str = IMAGE_FOLDER) -> AssetManifest:
+    """Scan the image folder once and record the size and hash of every referenced file."""
+    folder_exists = os.path.isdir(image_folder)
+    on_disk = {entry.name: entry for entry in os.scandir(image_folder) if entry.is_file()} if folder_exists else {}
+
+    files = {}
+    missing = {}
+    for bone, bone_data in catalog.bones.items():
+        missing[bone] = []
+        for image_file in bone_data["image_files"]:
+            entry = on_disk.get(image_file)
+            if entry is None:
+                missing[bone].append(image_file)
+            elif image_file not in files:
+                stat = entry.stat()
+                files[image_file] = AssetInfo(stat.st_size, stat.st_mtime_ns, file_hash(entry.path))
+    return AssetManifest(image_folder, folder_exists, files, missing)
+
+
+def format_report(manifest: AssetManifest) -> str:
+    """Return a human-readable report of present and missing assets."""
+    lines = []
+    if not manifest.folder_exists:
+        lines.append(f"Image folder '{manifest.image_folder}' not found")
+    total_bytes = sum(info.size for info in manifest.files.values())
+    lines.append(f"{len(manifest.files)} images present ({total_bytes // 1024} KB)")
+    for bone, files in manifest.missing.items():
+        if files:
+            lines.append(f"{bone}: {len(files)} missing")
+            lines.extend(f"  - {image_file}" for image_file in files)
+    if not manifest.incomplete_groups:
+        lines.append("All bone groups are complete")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List the catalog images missing from the image folder.")
+    parser.add_argument("--images", default=IMAGE_FOLDER, help="folder containing the source images")
+    parser.add_argument("--catalog", default=CATALOG_FILE, help="catalog JSON file")
+    args = parser.parse_args()
+
+    manifest = scan_assets(load_catalog(args.catalog), args.images)
+    print(format_report(manifest))
+    sys.exit(1 if manifest.incomplete_groups else 0)
+
+
+if __name__ == "__main__":
+    main()
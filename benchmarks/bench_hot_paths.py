@@ -0,0 +1,222 @@
+"""Micro-benchmarks of the quiz hot paths.
+
+Runs the app's functions against a stubbed ``streamlit`` module, so only the
+app's own work is measured, on the real catalog and on a synthetic catalog
+of 10,000 structures. Results are printed and can be written as JSON to be
+compared across commits:
+
+    python benchmarks/bench_hot_paths.py --output before.json
+    python benchmarks/bench_hot_paths.py --output after.json --compare before.json
+"""
+
+import argparse
+import functools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from contextlib import nullcontext
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SYNTHETIC_BONES = 100
+SYNTHETIC_COMPONENTS = 100
+WORDS = [
+    "tubercule", "fosse", "sillon", "crête", "processus", "foramen", "condyle", "épicondyle", "surface",
+    "articulaire", "tubérosité", "bord", "face", "angle", "col", "tête", "incisure", "lèvre", "médial",
+    "latéral", "crânial", "caudal", "dorsal", "palmaire", "proximal", "distal", "majeur", "mineur",
+]
+
+
+class _SessionState(dict):
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+def _cache_resource(func=None, **_kwargs):
+    """Stand-in for st.cache_resource: memoize on the arguments."""
+    if func is None:
+        return _cache_resource
+    return functools.lru_cache(maxsize=None)(func)
+
+
+def make_streamlit_stub() -> types.ModuleType:
+    """Return a ``streamlit`` module whose elements do nothing."""
+    st = types.ModuleType("streamlit")
+    st.session_state = _SessionState()
+    st.query_params = {}
+    st.cache_resource = _cache_resource
+    st.cache_data = _cache_resource
+
+    def _noop(*args, **kwargs):
+        return None
+
+    def _first_option(label, options, *args, **kwargs):
+        return options[0]
+
+    st.radio = _first_option
+    st.selectbox = _first_option
+    st.tabs = lambda labels: [nullcontext() for _ in labels]
+    st.columns = lambda spec, *args, **kwargs: [nullcontext() for _ in range(spec if isinstance(spec, int) else len(spec))]
+    st.__getattr__ = lambda name: _noop
+    return st
+
+
+def write_synthetic_catalog(path: str, bones: int = SYNTHETIC_BONES, components: int = SYNTHETIC_COMPONENTS):
+    """Write a catalog with ``bones * components`` structures."""
+    rng = random.Random(0)
+    data = {"version": 1, "bones": {}}
+    for b in range(bones):
+        data["bones"][f"Os {b}"] = {
+            "title": f"Os synthétique {b}",
+            "views": ["Latérale", "Médiale"],
+            "image_files": [f"synthetic_{b}_laterale.png", f"synthetic_{b}_mediale.png"],
+            "components": {
+                str(n): " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 5))).capitalize()
+                for n in range(1, components + 1)
+            },
+        }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def measure(func: Callable[[], object], min_time: float = 0.2, repeat: int = 5) -> Dict[str, float]:
+    """Time ``func`` and return per-call statistics in microseconds."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeat or number >= 1 << 20:
+            break
+        number *= 2
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number * 1e6)
+    return {
+        "median_us": statistics.median(samples),
+        "min_us": min(samples),
+        "mean_us": statistics.fmean(samples),
+        "calls": number * repeat,
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmarks(app, work_dir: str, synthetic_catalog: str) -> Dict[str, Dict[str, float]]:
+    """Run every benchmark and return their results by name."""
+    from catalog import normalize_answer
+
+    st = app.st
+    results = {}
+    catalogs = {"catalog": app.CATALOG_FILE, "synthetic10k": synthetic_catalog}
+
+    for label, catalog_file in catalogs.items():
+        app.CATALOG_FILE = catalog_file
+        catalog = app.get_catalog()
+        bones = list(catalog.bones)
+        answers = [catalog.answer(*pair) for pair in catalog.pairs]
+        rng = random.Random(1)
+        recent = app.deque(maxlen=app.NO_REPEAT_WINDOW)
+
+        results[f"generate_question[{label}]"] = measure(lambda: app.generate_question(bones, recent))
+        results[f"check_answer.exact[{label}]"] = measure(
+            lambda: app.check_answer(answers[rng.randrange(len(answers))], answers[rng.randrange(len(answers))])
+        )
+        results[f"check_answer.typo[{label}]"] = measure(
+            lambda: app.check_answer("tuberosite de l epinne scapulaire", answers[rng.randrange(len(answers))])
+        )
+        results[f"normalize_answer[{label}]"] = measure(
+            lambda: normalize_answer(answers[rng.randrange(len(answers))])
+        )
+        results[f"create_bone_diagram[{label}]"] = measure(
+            lambda: app.create_bone_diagram(bones[rng.randrange(len(bones))], rng.randint(1, 20))
+        )
+        results[f"display_anatomical_image[{label}]"] = measure(
+            lambda: app.display_anatomical_image(bones[rng.randrange(len(bones))])
+        )
+    app.CATALOG_FILE = catalogs["catalog"]
+
+    # Never migrate (and rename) the user's real legacy stats file into a throwaway database
+    app.STATS_FILE = os.path.join(work_dir, "osteology_stats.pkl")
+    for backend in ("memory", "sqlite"):
+        app.STATS_BACKEND = backend
+        app.STATS_DB = os.path.join(work_dir, f"bench_{backend}.db")
+        app.get_stats_store.cache_clear()
+        st.query_params["user"] = f"bench-{backend}"
+        results[f"save_persistent_stats[{backend}]"] = measure(
+            lambda: app.save_persistent_stats(total_questions=1, total_score=1, best_streak=3)
+        )
+        results[f"load_persistent_stats[{backend}]"] = measure(app.load_persistent_stats)
+        app.get_stats_store().close()
+    return results
+
+
+def print_results(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]] = None):
+    width = max(len(name) for name in results)
+    for name, result in results.items():
+        line = f"{name:<{width}}  {result['median_us']:>12.2f} µs"
+        if baseline and name in baseline:
+            ratio = result["median_us"] / baseline[name]["median_us"]
+            line += f"  ({ratio:.2f}x vs baseline)"
+        print(line)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the quiz hot paths.")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare against")
+    args = parser.parse_args(argv)
+
+    sys.modules["streamlit"] = make_streamlit_stub()
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import osteo_app as app
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        synthetic_catalog = os.path.join(work_dir, "synthetic_catalog.json")
+        write_synthetic_catalog(synthetic_catalog)
+        results = run_benchmarks(app, work_dir, synthetic_catalog)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print_results(results, baseline)
+
+    if args.output:
+        report = {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Headless load test: many simulated students using the quiz at once.
+
+Every student is a separate Streamlit session driven in-process through
+``streamlit.testing.v1.AppTest``, on its own thread and with its own
+``?user=`` id, so nothing leaves localhost. Each student loops over
+new question -> answer or skip -> next question. The report gives the
+rerun latency percentiles, the memory held per session and how long the
+stats backend was busy, and checks that no answer was lost in the stats.
+
+AppTest installs a process-global mock runtime for each run, so reruns are
+serialized by a lock; the time spent waiting for it is reported separately
+as queueing delay. Script runs hold the GIL anyway, so this is close to how
+one Streamlit process shares its CPU between sessions.
+
+    python benchmarks/load_test.py --students 20 --questions 15
+"""
+
+import argparse
+import gc
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_FILE = os.path.join(ROOT, "osteo_app.py")
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Return the q-th percentile (0-100) of the samples."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class BackendTimer:
+    """Wrap the stats backend's write methods to measure contention."""
+
+    def __init__(self, backend_class):
+        self.calls = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self._lock = threading.Lock()
+        for name in ("update", "save_cards"):
+            setattr(backend_class, name, self._timed(getattr(backend_class, name)))
+
+    def _timed(self, method):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.calls += 1
+                    self.total += elapsed
+                    self.worst = max(self.worst, elapsed)
+        return wrapper
+
+
+# AppTest runs cannot overlap (see the module docstring)
+_run_lock = threading.Lock()
+
+
+class Student:
+    """One simulated quiz session."""
+
+    def __init__(self, index: int, questions: int, accuracy: float, skip_rate: float, timeout: float,
+                 think_time: float = 0.0):
+        from streamlit.testing.v1 import AppTest
+
+        self.user_id = f"student-{index}"
+        self.questions = questions
+        self.accuracy = accuracy
+        self.skip_rate = skip_rate
+        self.rng = random.Random(index)
+        self.think_time = think_time
+        self.latencies: List[float] = []
+        self.waits: List[float] = []
+        self.answered = 0
+        self.error = None
+        self.at = AppTest.from_file(APP_FILE, default_timeout=timeout)
+        self.at.query_params["user"] = self.user_id
+
+    def _run(self, element=None):
+        if self.think_time:
+            time.sleep(self.rng.expovariate(1 / self.think_time))
+        queued = time.perf_counter()
+        with _run_lock:
+            start = time.perf_counter()
+            (element.run() if element is not None else self.at.run())
+            end = time.perf_counter()
+        self.waits.append(start - queued)
+        self.latencies.append(end - start)
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].message)
+
+    def _button(self, label: str):
+        for button in self.at.button:
+            if label in button.label:
+                return button
+        raise LookupError(f"{self.user_id}: no '{label}' button")
+
+    def play(self):
+        from catalog import load_catalog
+
+        try:
+            self._run()
+            self._run(self._button("Nouvelle Question").click())
+            for _ in range(self.questions):
+                correct_answer = load_catalog().question(self.at.session_state.quiz.question_id)[2]
+                if self.rng.random() < self.skip_rate:
+                    self._run(self._button("Passer").click())
+                else:
+                    answer = correct_answer if self.rng.random() < self.accuracy else "réponse fausse"
+                    self.at.text_input(key="answer_input").input(answer)
+                    self._run(self._button("Valider").click())
+                self.answered += 1
+                # The result is shown on the next rerun, with the "next question" button
+                self._run()
+                self._run(self._button("Question Suivante").click())
+        except Exception as exc:  # reported at the end, keep the other students running
+            self.error = exc
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent students on one Streamlit process.")
+    parser.add_argument("--students", type=int, default=10)
+    parser.add_argument("--questions", type=int, default=10, help="questions answered by each student")
+    parser.add_argument("--accuracy", type=float, default=0.6, help="share of correct answers")
+    parser.add_argument("--skip-rate", type=float, default=0.1, help="share of skipped questions")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean pause (s) before each action")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds allowed per rerun")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="osteo-load-")
+    # Keep every file the app writes out of the repository
+    os.environ["OSTEO_STATS_DB"] = os.path.join(work_dir, "load_test.db")
+    os.environ["OSTEO_STATS_FILE"] = os.path.join(work_dir, "osteology_stats.pkl")
+    os.environ["OSTEO_EVENT_LOG"] = os.path.join(work_dir, "answer_log")
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import stats_store
+
+    timer = BackendTimer(stats_store.SQLiteStatsStore)
+
+    # Warm up imports and process-wide caches so they are not counted per session
+    Student(-1, 0, 0, 0, args.timeout).at.run()
+    gc.collect()
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    students = [
+        Student(i, args.questions, args.accuracy, args.skip_rate, args.timeout, args.think_time)
+        for i in range(args.students)
+    ]
+    for student in students:
+        student.at.run()
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    memory_per_session = sum(stat.size_diff for stat in after.compare_to(before, "filename")) / args.students
+
+    threads = [threading.Thread(target=student.play, name=student.user_id) for student in students]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    # Flush the app's write-behind buffer before checking the stored counts
+    for obj in gc.get_objects():
+        if isinstance(obj, stats_store.WriteBehindStatsStore):
+            obj.flush()
+    backend = stats_store.SQLiteStatsStore(os.environ["OSTEO_STATS_DB"])
+    lost = {
+        student.user_id: student.answered - backend.load(student.user_id)["total_questions"]
+        for student in students
+        if backend.load(student.user_id)["total_questions"] != student.answered
+    }
+
+    latencies = [latency for student in students for latency in student.latencies]
+    waits = [wait for student in students for wait in student.waits]
+    errors = [f"{student.user_id}: {student.error}" for student in students if student.error]
+    report: Dict[str, float] = {
+        "reruns": len(latencies),
+        "reruns_per_second": len(latencies) / wall,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "queue_wait_p95_ms": percentile(waits, 95) * 1000,
+        "memory_per_session_kb": memory_per_session / 1024,
+        "stats_writes": timer.calls,
+        "stats_write_total_ms": timer.total * 1000,
+        "stats_write_worst_ms": timer.worst * 1000,
+    }
+    print(f"{args.students} students x {args.questions} questions in {wall:.1f} s")
+    for key, value in report.items():
+        print(f"  {key:<22} {value:,.1f}")
+    print(f"  lost updates           {sum(lost.values())}" + (f" {lost}" if lost else ""))
+    for error in errors:
+        print(f"  error: {error}")
+    sys.exit(1 if errors or lost else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Build every derived image asset of the catalog in parallel.
+
+Each image listed in the catalog's ``image_files`` is one job on a process
+pool: its display-size variants and prerendered highlights are built by
+``image_pipeline.build_variants``. Inputs whose content hash and hotspots
+match the last manifest are not decoded at all, so adding a bone group
+only builds that group's images. Outputs and the manifest are written
+atomically, then a timing report is printed.
+
+Usage: python build_assets.py [--workers N] [--images images] [--output image_variants]
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+from catalog import CATALOG_FILE, load_catalog
+from image_pipeline import (
+    IMAGE_FOLDER, MANIFEST_NAME, VARIANT_FOLDER, build_variants, file_hash, load_hotspots, write_manifest,
+)
+
+
+def build_job(source_path: str, output_dir: str, hotspots: Dict[int, Tuple[float, float]],
+              previous: Optional[Dict]) -> Tuple[Dict, float, bool]:
+    """Build one image's assets; return its manifest entry, the seconds spent and whether anything was rebuilt."""
+    start = time.perf_counter()
+    source_hash = file_hash(source_path)
+    entry = build_variants(source_path, output_dir, source_hash=source_hash, hotspots=hotspots, previous=previous)
+    return entry, time.perf_counter() - start, entry is not previous
+
+
+def read_manifest(output_dir: str) -> Dict:
+    """Return the last written manifest, or an empty one."""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def catalog_images(catalog_file: str) -> List[str]:
+    """Return every image file listed in the catalog, in catalog order."""
+    seen = {}
+    for bone_data in load_catalog(catalog_file).bones.values():
+        for image_file in bone_data["image_files"]:
+            seen.setdefault(image_file, None)
+    return list(seen)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Build the image variants and highlights of every catalog image.")
+    parser.add_argument("--images", default=IMAGE_FOLDER, help="folder containing the source PNGs")
+    parser.add_argument("--output", default=VARIANT_FOLDER, help="folder receiving the variants")
+    parser.add_argument("--catalog", default=CATALOG_FILE, help="catalog listing the images and hotspots")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    previous = read_manifest(args.output)
+    hotspots = load_hotspots(args.catalog)
+    images = catalog_images(args.catalog)
+    missing = [f for f in images if not os.path.exists(os.path.join(args.images, f))]
+    os.makedirs(args.output, exist_ok=True)
+
+    manifest, timings = {}, {}
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(build_job, os.path.join(args.images, f), args.output, hotspots.get(f, {}), previous.get(f)): f
+            for f in images if f not in missing
+        }
+        for future in as_completed(futures):
+            image_file = futures[future]
+            manifest[image_file], seconds, rebuilt = future.result()
+            timings[image_file] = (seconds, rebuilt)
+    write_manifest(dict(sorted(manifest.items())), args.output)
+    wall = time.perf_counter() - start
+
+    width = max((len(f) for f in images), default=0)
+    for image_file in images:
+        if image_file in missing:
+            print(f"{image_file:<{width}}  missing")
+        else:
+            seconds, rebuilt = timings[image_file]
+            print(f"{image_file:<{width}}  {seconds * 1000:8.0f} ms  {'built' if rebuilt else 'unchanged'}")
+    rebuilt = sum(1 for _, was_rebuilt in timings.values() if was_rebuilt)
+    busy = sum(seconds for seconds, _ in timings.values())
+    print(f"{len(timings)} images ({rebuilt} built, {len(timings) - rebuilt} unchanged, {len(missing)} missing) "
+          f"in {wall:.2f} s with {args.workers} workers ({busy:.2f} s of work) -> {args.output}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Anatomical catalog: loading, validation and precomputed indexes.
+
+The catalog lives in ``anatomical_data.json``::
+
+    {"version": 1,
+     "bones": {"Scapula": {"title": "...", "views": [...], "image_files": [...],
+                           "components": {"1": "Cartilage scapulaire", ...},
+                           "hotspots": {"scapula_mediale.png": {"1": [0.42, 0.08], ...}}}}}
+
+``hotspots`` is optional: it places structure numbers on a view, as x and y
+relative to the image size (0-1).
+
+It is loaded once per process and reloaded only when the file changes. If
+a changed file cannot be loaded (e.g. saved half-written), the last valid
+catalog keeps being served until the file is fixed.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Tuple
+
+from matcher import fold
+
+CATALOG_FILE = "anatomical_data.json"
+SCHEMA_VERSION = 1
+# Seconds during which a loaded catalog is trusted without checking the file's mtime
+CATALOG_RECHECK_SECONDS = 2.0
+
+logger = logging.getLogger(__name__)
+
+# Loaded catalogs: path -> (mtime, last check time, catalog)
+_catalog_cache: Dict[str, tuple] = {}
+
+
+class CatalogError(ValueError):
+    """Raised when the catalog file does not match the expected schema."""
+
+
+def normalize_answer(answer: str) -> str:
+    """Normalize answer for comparison (remove accents, lowercase, collapse spaces)."""
+    return " ".join(fold(answer).split())
+
+
+class Catalog:
+    """Validated bone groups plus indexes precomputed once per load.
+
+    - ``bones``: bone group -> {"title", "views", "image_files", "components"},
+      with integer component numbers
+    - ``pairs``: flat list of every (bone group, number); a structure's
+      position in this list is its integer structure ID
+    - ``pair_ids``: (bone group, number) -> structure ID
+    - ``counts``: bone group -> number of structures
+    - ``normalized``: (bone group, number) -> normalized answer
+    - ``located``: (bone group, number) -> image files where it has a hotspot
+    """
+
+    def __init__(self, bones: Dict[str, Dict], version: int = SCHEMA_VERSION, mtime: int = 0):
+        self.bones = bones
+        self.version = version
+        self.mtime = mtime
+        self.pairs: List[Tuple[str, int]] = [
+            (bone, number) for bone, bone_data in bones.items() for number in bone_data["components"]
+        ]
+        self.pair_ids: Dict[Tuple[str, int], int] = {pair: i for i, pair in enumerate(self.pairs)}
+        self.counts: Dict[str, int] = {bone: len(bone_data["components"]) for bone, bone_data in bones.items()}
+        self.normalized: Dict[Tuple[str, int], str] = {
+            (bone, number): normalize_answer(name)
+            for bone, bone_data in bones.items() for number, name in bone_data["components"].items()
+        }
+
+        self.located: Dict[Tuple[str, int], List[str]] = {}
+        for bone, bone_data in bones.items():
+            for image_file, points in bone_data.get("hotspots", {}).items():
+                for number in points:
+                    self.located.setdefault((bone, number), []).append(image_file)
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def hotspot(self, bone_group: str, image_file: str, number: int):
+        """Return the relative (x, y) position of a structure on a view, or None."""
+        return self.bones[bone_group].get("hotspots", {}).get(image_file, {}).get(number)
+
+    def question(self, structure_id: int) -> Tuple[str, int, str, str]:
+        """Return the bone group, number, name and bone title of a structure ID."""
+        bone_group, number = self.pairs[structure_id]
+        bone_data = self.bones[bone_group]
+        return bone_group, number, bone_data["components"][number], bone_data["title"]
+
+    def answer(self, bone_group: str, number: int) -> str:
+        """Return the name of a structure."""
+        return self.bones[bone_group]["components"][number]
+
+
+def _require(condition: bool, message: str):
+    if not condition:
+        raise CatalogError(message)
+
+
+def validate_catalog(raw: Dict) -> Dict[str, Dict]:
+    """Check the raw JSON content and return the bone groups with integer component numbers."""
+    _require(isinstance(raw, dict), "catalog must be a JSON object")
+    _require(raw.get("version") == SCHEMA_VERSION,
+             f"unsupported catalog version {raw.get('version')!r} (expected {SCHEMA_VERSION})")
+    bones = raw.get("bones")
+    _require(isinstance(bones, dict) and bones, "'bones' must be a non-empty object")
+
+    validated = {}
+    for bone, bone_data in bones.items():
+        where = f"bones[{bone!r}]"
+        _require(isinstance(bone_data, dict), f"{where} must be an object")
+        _require(isinstance(bone_data.get("title"), str), f"{where}.title must be a string")
+        views = bone_data.get("views")
+        image_files = bone_data.get("image_files")
+        _require(isinstance(views, list) and all(isinstance(v, str) for v in views),
+                 f"{where}.views must be a list of strings")
+        _require(isinstance(image_files, list) and all(isinstance(f, str) for f in image_files),
+                 f"{where}.image_files must be a list of strings")
+        _require(len(views) == len(image_files), f"{where} must have one image file per view")
+        components = bone_data.get("components")
+        _require(isinstance(components, dict) and components, f"{where}.components must be a non-empty object")
+
+        numbered = {}
+        for number, name in components.items():
+            _require(str(number).isdigit(), f"{where}.components key {number!r} must be a positive integer")
+            _require(isinstance(name, str) and name.strip(), f"{where}.components[{number}] must be a non-empty string")
+            numbered[int(number)] = name
+        validated[bone] = {**bone_data, "components": numbered}
+
+        hotspots = bone_data.get("hotspots")
+        if hotspots is not None:
+            _require(isinstance(hotspots, dict), f"{where}.hotspots must be an object")
+            validated[bone]["hotspots"] = {}
+            for image_file, points in hotspots.items():
+                _require(image_file in image_files, f"{where}.hotspots key {image_file!r} is not one of its image files")
+                _require(isinstance(points, dict), f"{where}.hotspots[{image_file!r}] must be an object")
+                located = {}
+                for number, point in points.items():
+                    _require(str(number).isdigit() and int(number) in numbered,
+                             f"{where}.hotspots[{image_file!r}] key {number!r} is not a component number")
+                    _require(isinstance(point, list) and len(point) == 2
+                             and all(isinstance(c, (int, float)) and 0 <= c <= 1 for c in point),
+                             f"{where}.hotspots[{image_file!r}][{number}] must be [x, y] between 0 and 1")
+                    located[int(number)] = (float(point[0]), float(point[1]))
+                validated[bone]["hotspots"][image_file] = located
+    return validated
+
+
+def load_catalog(path: str = CATALOG_FILE) -> Catalog:
+    """Return the catalog at ``path``, parsing it only when the file changed."""
+    now = time.monotonic()
+    cached = _catalog_cache.get(path)
+    if cached is not None and now - cached[1] < CATALOG_RECHECK_SECONDS:
+        return cached[2]
+    mtime = None
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        if cached is not None and cached[0] == mtime:
+            catalog = cached[2]
+        else:
+            with open(path, encoding="utf-8") as f:
+                raw = json.load(f)
+            catalog = Catalog(validate_catalog(raw), raw["version"], mtime)
+    except (OSError, ValueError) as error:
+        if cached is None:
+            raise
+        # Keep serving the last valid catalog; the file is parsed again once it changes
+        logger.error("Cannot reload %s, keeping the previous catalog: %s", path, error)
+        _catalog_cache[path] = (cached[0] if mtime is None else mtime, now, cached[2])
+        return cached[2]
+    _catalog_cache[path] = (mtime, now, catalog)
+    return catalog
@@ -0,0 +1,87 @@
+"""Precomputed distractors for multiple-choice questions.
+
+For every structure, the index keeps the ``k`` other structures of the same
+bone group whose names are most alike: most key words in common (Jaccard
+overlap of the normalized tokens), then neighbouring numbers to fill up,
+never two with the same name. Building it is done once per catalog load;
+drawing the choices of a question is then a constant-time sample from a
+short precomputed list.
+"""
+
+import itertools
+import random
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from catalog import Catalog
+from matcher import SHORT_TOKEN_LENGTH, tokenize
+
+# Distractors kept per structure, and choices shown per question
+DISTRACTORS_PER_STRUCTURE = 8
+CHOICES_PER_QUESTION = 4
+
+
+def key_tokens(normalized_name: str) -> frozenset:
+    """Return the key words of a normalized structure name."""
+    tokens = tokenize(normalized_name)
+    return frozenset(token for token in tokens if len(token) > SHORT_TOKEN_LENGTH) or frozenset(tokens)
+
+
+def nearby_positions(position: int, size: int) -> Iterator[int]:
+    """Yield the other positions of a list of ``size`` items, closest to ``position`` first."""
+    for distance in range(1, size):
+        if position - distance >= 0:
+            yield position - distance
+        if position + distance < size:
+            yield position + distance
+
+
+class DistractorIndex:
+    """Structure ID -> the IDs of its most similar structures in the same bone group."""
+
+    def __init__(self, catalog: Catalog, k: int = DISTRACTORS_PER_STRUCTURE):
+        self.k = k
+        self.distractors: List[Tuple[int, ...]] = [()] * len(catalog)
+        groups: Dict[str, List[int]] = {}
+        for structure_id, (bone, _) in enumerate(catalog.pairs):
+            groups.setdefault(bone, []).append(structure_id)
+        for bone, ids in groups.items():
+            self._index_group(catalog, ids)
+
+    def _index_group(self, catalog: Catalog, ids: Sequence[int]) -> None:
+        names = [catalog.normalized[catalog.pairs[i]] for i in ids]
+        tokens = [key_tokens(name) for name in names]
+        # Inverted index: only structures sharing a key word are compared
+        by_token: Dict[str, List[int]] = {}
+        for position, words in enumerate(tokens):
+            for word in words:
+                by_token.setdefault(word, []).append(position)
+
+        for position, structure_id in enumerate(ids):
+            shared: Dict[int, int] = {}
+            for word in tokens[position]:
+                for other in by_token[word]:
+                    shared[other] = shared.get(other, 0) + 1
+            ranked = sorted(
+                shared,
+                key=lambda other: (-shared[other] / len(tokens[position] | tokens[other]), abs(other - position)),
+            )
+            chosen = []
+            # Choices must read differently: one structure per name
+            seen_names = {names[position]}
+            # Then the structures numbered closest to this one
+            for other in itertools.chain(ranked, nearby_positions(position, len(ids))):
+                if len(chosen) == self.k:
+                    break
+                if names[other] not in seen_names:
+                    seen_names.add(names[other])
+                    chosen.append(other)
+            self.distractors[structure_id] = tuple(ids[other] for other in chosen)
+
+    def choices(self, structure_id: int, n: int = CHOICES_PER_QUESTION,
+                rng: Optional[random.Random] = None) -> Tuple[int, ...]:
+        """Return ``n`` shuffled structure IDs: the answer and ``n - 1`` of its distractors."""
+        rng = rng or random
+        candidates = self.distractors[structure_id]
+        picked = rng.sample(candidates, min(n - 1, len(candidates))) + [structure_id]
+        rng.shuffle(picked)
+        return tuple(picked)
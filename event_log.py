@@ -0,0 +1,269 @@
+"""Append-only log of every answered question.
+
+Each submit or skip is one compact JSON line::
+
+    {"ts":1760781600.5,"user":"default","bone":"Scapula","number":3,"correct":false,"skipped":false,"latency":4.2,"matched":5}
+
+``matched`` is the structure a wrong answer named instead, when it names one.
+
+Events are buffered in memory and appended by a background thread, so
+recording one never touches the disk on the request path. The active file
+is rotated to a timestamped segment once it reaches ``max_bytes``; segments
+are never rewritten, so the log is the full answer history.
+
+Aggregates (accuracy, streaks, per-structure counts) are derived from the
+log incrementally: ``AnswerAggregator.refresh()`` only reads the bytes
+appended since its last call.
+
+Usage: python event_log.py [--log answer_log] prints the aggregates.
+"""
+
+import argparse
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+EVENT_LOG_DIR = os.environ.get("OSTEO_EVENT_LOG", "answer_log")
+ACTIVE_SEGMENT = "answers.jsonl"
+SEGMENT_PREFIX = "answers-"
+# Size at which the active file is rotated
+MAX_SEGMENT_BYTES = 8 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerEvent(NamedTuple):
+    ts: float
+    user: str
+    bone: str
+    number: int
+    correct: bool
+    skipped: bool
+    latency: float
+    matched: Optional[int] = None
+
+    def to_json(self) -> str:
+        return json.dumps(self._asdict(), ensure_ascii=False, separators=(",", ":"))
+
+
+def segment_paths(directory: str = EVENT_LOG_DIR) -> List[str]:
+    """Return the log segments, oldest first, the active file last."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    segments = sorted(n for n in names if n.startswith(SEGMENT_PREFIX) and n.endswith(".jsonl"))
+    if ACTIVE_SEGMENT in names:
+        segments.append(ACTIVE_SEGMENT)
+    return [os.path.join(directory, n) for n in segments]
+
+
+def read_events(directory: str = EVENT_LOG_DIR) -> Iterator[AnswerEvent]:
+    """Yield every complete event of the log, oldest first."""
+    for path in segment_paths(directory):
+        with open(path, "rb") as f:
+            for line in f:
+                if line.endswith(b"\n"):
+                    yield AnswerEvent(**json.loads(line))
+
+
+class EventLog:
+    """Buffered, rotated writer of answer events.
+
+    Pending events are appended every ``flush_interval`` seconds, when
+    ``max_pending`` are buffered, and when the process exits.
+    """
+
+    def __init__(self, directory: str = EVENT_LOG_DIR, max_bytes: int = MAX_SEGMENT_BYTES,
+                 max_pending: int = 200, flush_interval: float = 1.0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        os.makedirs(directory, exist_ok=True)
+        self._pending: List[AnswerEvent] = []
+        self._lock = threading.Lock()
+        # Serializes appends and rotations
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="answer-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def append(self, event: AnswerEvent) -> None:
+        """Buffer one event."""
+        with self._lock:
+            self._pending.append(event)
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def flush(self) -> None:
+        """Append every buffered event to the active segment."""
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            path = os.path.join(self.directory, ACTIVE_SEGMENT)
+            data = "".join(event.to_json() + "\n" for event in batch).encode("utf-8")
+            try:
+                self._rotate_if_full(path)
+                with open(path, "ab") as f:
+                    f.write(data)
+            except OSError:
+                # Keep the events in front of newer ones and retry on the next flush
+                with self._lock:
+                    self._pending[:0] = batch
+
+    def _rotate_if_full(self, path: str) -> None:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        if size >= self.max_bytes:
+            stamp = time.strftime("%Y%m%dT%H%M%S")
+            os.rename(path, os.path.join(self.directory, f"{SEGMENT_PREFIX}{stamp}-{time.time_ns() % 10**9:09d}.jsonl"))
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Keep writing later events whatever happened to this batch
+                logger.exception("Answer log flush failed")
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+
+
+_event_logs: Dict[str, EventLog] = {}
+_event_logs_lock = threading.Lock()
+
+
+def get_event_log(directory: str = EVENT_LOG_DIR) -> EventLog:
+    """Return the process's single writer of the log in ``directory``, shared by every page."""
+    with _event_logs_lock:
+        log = _event_logs.get(directory)
+        if log is None:
+            log = _event_logs[directory] = EventLog(directory)
+        return log
+
+
+class UserAggregate:
+    """Running totals of one user's answers."""
+
+    __slots__ = ("answered", "correct", "skipped", "streak", "best_streak")
+
+    def __init__(self):
+        self.answered = 0
+        self.correct = 0
+        self.skipped = 0
+        self.streak = 0
+        self.best_streak = 0
+
+    @property
+    def accuracy(self) -> float:
+        return self.correct / self.answered if self.answered else 0.0
+
+    def add(self, event: AnswerEvent) -> None:
+        self.answered += 1
+        self.skipped += event.skipped
+        if event.correct:
+            self.correct += 1
+            self.streak += 1
+            self.best_streak = max(self.best_streak, self.streak)
+        else:
+            self.streak = 0
+
+
+class AnswerAggregator:
+    """Aggregates of the answer log, updated from the bytes appended since the last refresh.
+
+    Read positions are kept per file identity (device, inode), so a rotated
+    segment is recognised under its new name and never read twice.
+    """
+
+    def __init__(self, directory: str = EVENT_LOG_DIR):
+        self.directory = directory
+        self.users: Dict[str, UserAggregate] = {}
+        # (bone, number) -> [answered, correct]
+        self.structures: Dict[Tuple[str, int], List[int]] = {}
+        self.events = 0
+        self._offsets: Dict[Tuple[int, int], int] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self) -> int:
+        """Read the new events and return how many were added."""
+        added = 0
+        with self._lock:
+            for path in segment_paths(self.directory):
+                try:
+                    f = open(path, "rb")
+                except FileNotFoundError:
+                    # Rotated away since the listing: read under its new name next time
+                    continue
+                with f:
+                    info = os.fstat(f.fileno())
+                    identity = (info.st_dev, info.st_ino)
+                    offset = self._offsets.get(identity, 0)
+                    if info.st_size <= offset:
+                        continue
+                    f.seek(offset)
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            # Partially written line: read it on the next refresh
+                            break
+                        offset += len(line)
+                        self._add(AnswerEvent(**json.loads(line)))
+                        added += 1
+                    self._offsets[identity] = offset
+        return added
+
+    def _add(self, event: AnswerEvent) -> None:
+        self.events += 1
+        self.users.setdefault(event.user, UserAggregate()).add(event)
+        counts = self.structures.setdefault((event.bone, event.number), [0, 0])
+        counts[0] += 1
+        counts[1] += event.correct
+
+    def hardest(self, limit: int = 10, min_answers: int = 5) -> List[Tuple[Tuple[str, int], float, int]]:
+        """Return the structures with the lowest accuracy as ((bone, number), accuracy, answers)."""
+        with self._lock:
+            rated = [
+                (structure, correct / answered, answered)
+                for structure, (answered, correct) in self.structures.items() if answered >= min_answers
+            ]
+        return sorted(rated, key=lambda item: (item[1], -item[2]))[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the aggregates of the answer log.")
+    parser.add_argument("--log", default=EVENT_LOG_DIR, help="answer log directory")
+    args = parser.parse_args()
+
+    aggregator = AnswerAggregator(args.log)
+    aggregator.refresh()
+    print(f"{aggregator.events} answers in {len(segment_paths(args.log))} segment(s)")
+    for user, totals in sorted(aggregator.users.items()):
+        print(f"  {user}: {totals.correct}/{totals.answered} ({totals.accuracy:.0%}), "
+              f"{totals.skipped} skipped, best streak {totals.best_streak}")
+    for (bone, number), accuracy, answers in aggregator.hardest():
+        print(f"  {bone} #{number}: {accuracy:.0%} of {answers}")
+
+
+if __name__ == "__main__":
+    main()
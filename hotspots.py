@@ -0,0 +1,80 @@
+"""Structure locations on the anatomical images.
+
+Hotspots are stored in the catalog as coordinates relative to the image
+(0-1 on both axes), so one set of coordinates serves every image variant.
+For a given variant they are scaled to pixels once and put in a uniform
+grid, which resolves a click to the nearest structure in constant time.
+"""
+
+import io
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+# Click tolerance and highlight size, as a share of the image width
+HOTSPOT_RADIUS = 0.04
+HIGHLIGHT_COLOR = (255, 68, 68)
+
+
+class HotspotIndex:
+    """Uniform grid over the hotspots of one image variant."""
+
+    def __init__(self, hotspots: Dict[int, Tuple[float, float]], width: int, height: int,
+                 radius: float = HOTSPOT_RADIUS):
+        self.width = width
+        self.height = height
+        self.radius = max(1.0, radius * width)
+        self.cell = 2 * self.radius
+        # Pixel position of every structure number
+        self.points: Dict[int, Tuple[float, float]] = {
+            number: (x * width, y * height) for number, (x, y) in hotspots.items()
+        }
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        for number, (px, py) in self.points.items():
+            self._grid.setdefault(self._cell_of(px, py), []).append(number)
+
+    def _cell_of(self, px: float, py: float) -> Tuple[int, int]:
+        return int(px // self.cell), int(py // self.cell)
+
+    def locate(self, number: int) -> Optional[Tuple[float, float]]:
+        """Return the pixel position of a structure, if it has a hotspot."""
+        return self.points.get(number)
+
+    def hit(self, px: float, py: float) -> Optional[int]:
+        """Return the structure closest to a pixel within the click radius, or None."""
+        cx, cy = self._cell_of(px, py)
+        best, best_distance = None, self.radius ** 2
+        # The radius is half a cell, so only the 3x3 neighbouring cells can match
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                for number in self._grid.get((gx, gy), ()):
+                    x, y = self.points[number]
+                    distance = (x - px) ** 2 + (y - py) ** 2
+                    if distance <= best_distance:
+                        best, best_distance = number, distance
+        return best
+
+
+def draw_highlight(image: Image.Image, point: Tuple[float, float], radius: float = HOTSPOT_RADIUS) -> Image.Image:
+    """Return an RGBA copy of the image with a ring drawn around a relative (0-1) position."""
+    image = image.convert("RGBA")
+    width, height = image.size
+    x, y = point[0] * width, point[1] * height
+    r = max(4.0, radius * width)
+    overlay = Image.new("RGBA", image.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    draw.ellipse((x - r, y - r, x + r, y + r), fill=HIGHLIGHT_COLOR + (60,), outline=HIGHLIGHT_COLOR + (255,),
+                 width=max(2, int(r / 6)))
+    return Image.alpha_composite(image, overlay)
+
+
+def render_highlight(image_bytes: bytes, point: Tuple[float, float], radius: float = HOTSPOT_RADIUS,
+                     fmt: str = "PNG") -> bytes:
+    """Return the encoded image with a ring drawn around a relative (0-1) position."""
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        highlighted = draw_highlight(image, point, radius)
+    if fmt.upper() == "JPEG":
+        highlighted = highlighted.convert("RGB")
+    output = io.BytesIO()
+    highlighted.save(output, format=fmt)
+    return output.getvalue()
@@ -0,0 +1,113 @@
+"""Process-wide, memory-bounded LRU cache of image file contents."""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_REVALIDATE_AFTER = 5.0
+
+
+class ImageBytesCache:
+    """LRU cache of file bytes keyed by path and mtime, bounded by total size.
+
+    An entry is served straight from memory for ``revalidate_after`` seconds
+    after it was last checked; only then is the file's mtime compared again.
+    Missing files are cached too, so absent images do not hit the disk on
+    every render either.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, revalidate_after: float = DEFAULT_REVALIDATE_AFTER):
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+        # path -> (mtime_ns, data or None if missing, last check time)
+        self._entries: "OrderedDict[str, Tuple[Optional[int], Optional[bytes], float]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str) -> Optional[bytes]:
+        """Return the content of ``path``, or None if the file does not exist."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and now - entry[2] < self.revalidate_after:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == mtime:
+                # Unchanged on disk: only refresh the check time
+                self._entries[path] = (mtime, entry[1], now)
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        data = None
+        if mtime is not None:
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                mtime = None
+        self.put(path, mtime, data, now)
+        return data
+
+    def __contains__(self, path: str) -> bool:
+        with self._lock:
+            return path in self._entries
+
+    def prefetch(self, paths) -> None:
+        """Load the given files into the cache on a low-priority background thread."""
+        missing = [path for path in paths if path not in self]
+        if missing:
+            threading.Thread(target=lambda: [self.get(path) for path in missing],
+                             name="image-prefetch", daemon=True).start()
+
+    def put(self, path: str, mtime: Optional[int], data: Optional[bytes], checked_at: Optional[float] = None) -> None:
+        """Store the content of ``path`` and evict least recently used entries if needed."""
+        size = len(data) if data is not None else 0
+        if size > self.max_bytes:
+            return
+        checked_at = time.monotonic() if checked_at is None else checked_at
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if previous is not None and previous[1] is not None:
+                self._size -= len(previous[1])
+            self._entries[path] = (mtime, data, checked_at)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                if evicted is not None:
+                    self._size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit/miss counters and current memory usage."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+            }
@@ -0,0 +1,268 @@
+"""Build and look up display-size variants of the anatomical images.
+
+The build step downscales every source PNG to a few widths and re-encodes
+them as WebP and JPEG. Variant files are named after the hash of their
+source, so unchanged images are never rebuilt and a stale variant can never
+be served for an edited image. A manifest maps each source file to its
+variants and is what the app reads at runtime.
+
+Structures placed on a view by the catalog's hotspots also get one
+prerendered highlighted copy per variant, so showing a highlighted
+structure costs the same as showing the plain image. Their names include
+a hash of the hotspot position, so moving a hotspot renders a new file.
+
+Usage: python image_pipeline.py [--images images] [--output image_variants]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from PIL import Image
+
+from catalog import CATALOG_FILE, load_catalog
+from hotspots import HIGHLIGHT_COLOR, HOTSPOT_RADIUS, draw_highlight
+
+IMAGE_FOLDER = "images"
+VARIANT_FOLDER = "image_variants"
+MANIFEST_NAME = "manifest.json"
+VARIANT_WIDTHS = (320, 480, 720, 1080)
+VARIANT_FORMATS = ("webp", "jpeg")
+VARIANT_QUALITY = {"webp": 80, "jpeg": 82}
+
+# Seconds during which a loaded manifest is trusted without checking its mtime
+MANIFEST_RECHECK_SECONDS = 5.0
+
+# Loaded manifests: path -> (mtime, last check time, manifest)
+_manifest_cache: Dict[str, tuple] = {}
+
+
+def file_hash(path: str) -> str:
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def atomic_write(path: str, write) -> None:
+    """Call ``write(file)`` on a temporary file, then move it to ``path``."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def variant_name(source_file: str, source_hash: str, width: int, fmt: str) -> str:
+    """Return the content-addressed file name of a variant."""
+    stem = os.path.splitext(os.path.basename(source_file))[0]
+    extension = "jpg" if fmt == "jpeg" else fmt
+    return f"{stem}-{source_hash[:12]}-{width}.{extension}"
+
+
+def overlay_name(variant: str, number: int, point: Tuple[float, float]) -> str:
+    """Return the content-addressed file name of a variant highlighting one structure."""
+    key = hashlib.sha256(f"{point[0]:.4f},{point[1]:.4f},{HOTSPOT_RADIUS},{HIGHLIGHT_COLOR}".encode()).hexdigest()
+    stem, extension = os.path.splitext(variant)
+    return f"{stem}-s{number}-{key[:8]}{extension}"
+
+
+def load_hotspots(catalog_file: str = CATALOG_FILE) -> Dict[str, Dict[int, Tuple[float, float]]]:
+    """Return the hotspots of every image file in the catalog."""
+    hotspots: Dict[str, Dict[int, Tuple[float, float]]] = {}
+    for bone_data in load_catalog(catalog_file).bones.values():
+        for image_file, points in bone_data.get("hotspots", {}).items():
+            hotspots.setdefault(image_file, {}).update(points)
+    return hotspots
+
+
+def _save(image: Image.Image, path: str, fmt: str) -> None:
+    if fmt == "jpeg":
+        # JPEG has no alpha channel: flatten transparent areas on white
+        rgba = image.convert("RGBA")
+        image = Image.new("RGB", rgba.size, "white")
+        image.paste(rgba, mask=rgba.getchannel("A"))
+    atomic_write(path, lambda f: image.save(f, format=fmt.upper(), quality=VARIANT_QUALITY[fmt]))
+
+
+def entry_is_current(entry: Optional[Dict], source_hash: str, hotspots: Dict[int, Tuple[float, float]],
+                     output_dir: str = VARIANT_FOLDER) -> bool:
+    """Return True if a manifest entry was built from this source and these hotspots and all its files exist."""
+    if not entry or entry.get("hash") != source_hash:
+        return False
+    expected = {
+        str(number): {
+            fmt: {width: overlay_name(name, number, point) for width, name in by_width.items()}
+            for fmt, by_width in entry["variants"].items()
+        }
+        for number, point in hotspots.items()
+    }
+    if entry.get("overlays", {}) != expected:
+        return False
+    names = [name for by_width in entry["variants"].values() for name in by_width.values()]
+    names += [name for by_fmt in expected.values() for by_width in by_fmt.values() for name in by_width.values()]
+    return all(os.path.exists(os.path.join(output_dir, name)) for name in names)
+
+
+def target_widths(source_width: int, widths: Iterable[int]) -> list:
+    """Return the variant widths to build, never upscaling the source."""
+    widths = list(widths)
+    result = {w for w in widths if w < source_width}
+    result.add(min(source_width, max(widths)))
+    return sorted(result)
+
+
+def build_variants(source_path: str, output_dir: str = VARIANT_FOLDER,
+                   widths: Iterable[int] = VARIANT_WIDTHS,
+                   formats: Iterable[str] = VARIANT_FORMATS,
+                   source_hash: Optional[str] = None,
+                   hotspots: Optional[Dict[int, Tuple[float, float]]] = None,
+                   previous: Optional[Dict] = None) -> Dict:
+    """Build every missing variant (and highlighted variant) of one source image and return its manifest entry.
+
+    ``previous`` is the image's entry in the last manifest: if it is still
+    current, it is returned without decoding the image.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    source_hash = source_hash or file_hash(source_path)
+    hotspots = hotspots or {}
+    if entry_is_current(previous, source_hash, hotspots, output_dir):
+        return previous
+    with Image.open(source_path) as image:
+        image.load()
+        source_width, source_height = image.size
+        entry = {"hash": source_hash, "width": source_width, "height": source_height, "variants": {}, "overlays": {}}
+        for width in target_widths(source_width, widths):
+            height = round(source_height * width / source_width)
+            resized = None
+            for fmt in formats:
+                name = variant_name(source_path, source_hash, width, fmt)
+                entry["variants"].setdefault(fmt, {})[str(width)] = name
+                missing = [name] + [overlay_name(name, n, point) for n, point in hotspots.items()]
+                if all(os.path.exists(os.path.join(output_dir, m)) for m in missing):
+                    continue
+                if resized is None:
+                    resized = image.resize((width, height), Image.LANCZOS) if width != source_width else image
+                if not os.path.exists(os.path.join(output_dir, name)):
+                    _save(resized, os.path.join(output_dir, name), fmt)
+                for number, point in hotspots.items():
+                    path = os.path.join(output_dir, overlay_name(name, number, point))
+                    if not os.path.exists(path):
+                        _save(draw_highlight(resized, point), path, fmt)
+            for fmt in formats:
+                for number, point in hotspots.items():
+                    entry["overlays"].setdefault(str(number), {}).setdefault(fmt, {})[str(width)] = overlay_name(
+                        entry["variants"][fmt][str(width)], number, point
+                    )
+    return entry
+
+
+def build_all(image_folder: str = IMAGE_FOLDER, output_dir: str = VARIANT_FOLDER,
+              catalog_file: str = CATALOG_FILE) -> Dict:
+    """Build the variants of every PNG in ``image_folder`` and write the manifest."""
+    hotspots = load_hotspots(catalog_file)
+    manifest = {}
+    for file_name in sorted(os.listdir(image_folder)):
+        if file_name.lower().endswith(".png"):
+            manifest[file_name] = build_variants(os.path.join(image_folder, file_name), output_dir,
+                                                 hotspots=hotspots.get(file_name))
+    write_manifest(manifest, output_dir)
+    return manifest
+
+
+def write_manifest(manifest: Dict, output_dir: str = VARIANT_FOLDER) -> None:
+    """Atomically write the variant manifest."""
+    os.makedirs(output_dir, exist_ok=True)
+    data = json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8")
+    atomic_write(os.path.join(output_dir, MANIFEST_NAME), lambda f: f.write(data))
+
+
+def load_manifest(output_dir: str = VARIANT_FOLDER) -> Dict:
+    """Return the variant manifest, or an empty one if the build step never ran."""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    now = time.monotonic()
+    cached = _manifest_cache.get(path)
+    if cached is not None and now - cached[1] < MANIFEST_RECHECK_SECONDS:
+        return cached[2]
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    if cached is not None and cached[0] == mtime:
+        manifest = cached[2]
+    elif mtime is None:
+        manifest = {}
+    else:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    _manifest_cache[path] = (mtime, now, manifest)
+    return manifest
+
+
+def select_variant(manifest: Dict, image_file: str, display_width: int, fmt: str = "webp",
+                   highlighted_number: Optional[int] = None) -> Optional[str]:
+    """Return the smallest variant at least ``display_width`` wide (or the largest one).
+
+    With ``highlighted_number``, return the prerendered variant highlighting that structure.
+    """
+    entry = manifest.get(image_file, {})
+    if highlighted_number is None:
+        variants = entry.get("variants", {}).get(fmt)
+    else:
+        variants = entry.get("overlays", {}).get(str(highlighted_number), {}).get(fmt)
+    if not variants:
+        return None
+    widths = sorted(int(w) for w in variants)
+    chosen = next((w for w in widths if w >= display_width), widths[-1])
+    return variants[str(chosen)]
+
+
+def resolve_image_path(image_file: str, display_width: int, image_folder: str = IMAGE_FOLDER,
+                       output_dir: str = VARIANT_FOLDER, fmt: str = "webp") -> str:
+    """Return the path of the best built variant, falling back to the source image."""
+    name = select_variant(load_manifest(output_dir), image_file, display_width, fmt)
+    if name is None:
+        return os.path.join(image_folder, image_file)
+    return os.path.join(output_dir, name)
+
+
+def resolve_overlay_path(image_file: str, number: int, display_width: int, output_dir: str = VARIANT_FOLDER,
+                         fmt: str = "webp") -> Optional[str]:
+    """Return the path of the prerendered variant highlighting a structure, if one was built."""
+    name = select_variant(load_manifest(output_dir), image_file, display_width, fmt, highlighted_number=number)
+    return None if name is None else os.path.join(output_dir, name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build display-size variants of the anatomical images.")
+    parser.add_argument("--images", default=IMAGE_FOLDER, help="folder containing the source PNGs")
+    parser.add_argument("--output", default=VARIANT_FOLDER, help="folder receiving the variants")
+    parser.add_argument("--catalog", default=CATALOG_FILE, help="catalog whose hotspots are prerendered")
+    args = parser.parse_args()
+
+    manifest = build_all(args.images, args.output, args.catalog)
+    source_bytes = sum(os.path.getsize(os.path.join(args.images, f)) for f in manifest)
+    for file_name, entry in manifest.items():
+        sizes = ", ".join(
+            f"{fmt} {w}px {os.path.getsize(os.path.join(args.output, name)) // 1024} KB"
+            for fmt, by_width in entry["variants"].items() for w, name in by_width.items()
+        )
+        print(f"{file_name}: {sizes}")
+    overlays = sum(len(entry["overlays"]) for entry in manifest.values())
+    print(f"{len(manifest)} images ({source_bytes // 1024} KB of sources), "
+          f"{overlays} highlighted structures -> {args.output}/")
+
+
+if __name__ == "__main__":
+    main()
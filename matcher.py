@@ -0,0 +1,199 @@
+"""Precompiled answer matching with accent folding and typo tolerance.
+
+Every catalog answer is compiled once into its accepted forms and key
+tokens, so checking an answer is a set lookup plus a few short edit-distance
+comparisons. The accept/reject behaviour is pinned by the examples below
+(run them with ``python -m doctest matcher.py``):
+
+>>> m = AnswerMatcher(["Tubérosité de l'épine scapulaire", "Epine scapulaire", "Bord caudal ou axillaire",
+...                    "Métacarpien principal (III)", "Face latérale : sillon brachial", "Col",
+...                    "Fosse supra-épineuse", "Fosse infra-épineuse"])
+>>> m.check("tuberosite de l'epine scapulaire", "Tubérosité de l'épine scapulaire")
+True
+>>> m.check("TUBÉROSITÉ ÉPINE", "Tubérosité de l'épine scapulaire")
+True
+>>> m.check("tuberosite", "Tubérosité de l'épine scapulaire")
+False
+>>> m.check("epine scapulaire", "Tubérosité de l'épine scapulaire")
+False
+>>> m.check("fosse infra epineuse", "Fosse supra-épineuse")
+False
+>>> m.check("fosse supraepineuse", "Fosse supra-épineuse")
+True
+>>> m.check("fosse supra epineuse", "Fosse supra-épineuse")
+True
+>>> m.check("tuberosite de l epinne scapulaire", "Tubérosité de l'épine scapulaire")
+True
+>>> m.check("bord axillaire", "Bord caudal ou axillaire")
+True
+>>> m.check("bord cranial", "Bord caudal ou axillaire")
+False
+>>> m.check("metacarpien principal", "Métacarpien principal (III)")
+True
+>>> m.check("cavite glenoidale mediale", "Cavité glénoïdale (glène) latérale")
+False
+>>> m.check("cavite glenoidale laterale", "Cavité glénoïdale (glène) latérale")
+True
+>>> m.check("sillon brachial", "Face latérale : sillon brachial")
+True
+>>> m.check("col", "Col")
+True
+>>> m.check("cil", "Col")
+False
+>>> m.check("", "Col")
+False
+"""
+
+import re
+import unicodedata
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Tuple
+
+# Tokens this long or shorter are not key words (articles, "de", "du", ...)
+SHORT_TOKEN_LENGTH = 3
+# Share of the key words an answer must contain to be accepted
+KEYWORD_RATIO = 0.6
+
+# Hyphenated words stay whole: "infra-epineuse" must not share a key word with "supra-epineuse"
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+_PARENTHESES_RE = re.compile(r"\s*\([^)]*\)")
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip every accent (full Unicode NFKD folding)."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> Tuple[str, ...]:
+    """Split folded text into alphanumeric tokens."""
+    return tuple(_TOKEN_RE.findall(text))
+
+
+def typo_budget(length: int) -> int:
+    """Return how many edits a word of this length may contain."""
+    if length <= 4:
+        return 0
+    if length <= 8:
+        return 1
+    return 2
+
+
+def bounded_edit_distance(a: str, b: str, bound: int) -> int:
+    """Return the Levenshtein distance of a and b, or ``bound + 1`` if it exceeds ``bound``."""
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+    if a == b:
+        return 0
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+        if min(current) > bound:
+            return bound + 1
+        previous = current
+    return min(previous[-1], bound + 1)
+
+
+def _joined_forms(candidates: Iterable[str]) -> FrozenSet[str]:
+    return frozenset(" ".join(tokens) for tokens in map(tokenize, candidates) if tokens)
+
+
+def alternative_forms(answer: str) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """Return the folded forms accepted verbatim, and the subset graded by key words.
+
+    "A ou B" accepts A and B ("Bord caudal ou axillaire" also accepts "bord
+    axillaire") and "A : B" accepts A and B. Parenthesised parts may be left
+    out, but only in a verbatim answer: dropping them from the key words would
+    let "cavité glénoïdale médiale" pass for "Cavité glénoïdale (glène) latérale".
+    """
+    base = fold(answer)
+    graded = [base]
+    if ":" in base:
+        graded.extend(part for part in base.split(":") if part.strip())
+    for candidate in list(graded):
+        if " ou " in candidate:
+            left, right = candidate.split(" ou ", 1)
+            graded.extend([left, right])
+            left_tokens = tokenize(left)
+            if len(tokenize(right)) == 1 and len(left_tokens) > 1:
+                # "Bord caudal ou axillaire" -> "bord axillaire"
+                graded.append(" ".join(left_tokens[:-1] + tokenize(right)))
+    exact = graded + [_PARENTHESES_RE.sub("", candidate) for candidate in graded]
+    return _joined_forms(exact), _joined_forms(graded)
+
+
+class CompiledAnswer(NamedTuple):
+    # Folded forms accepted verbatim
+    forms: FrozenSet[str]
+    # Key words of each form graded by key-word overlap
+    keywords: Tuple[Tuple[str, ...], ...]
+
+
+def compile_answer(answer: str) -> CompiledAnswer:
+    """Precompute the accepted forms and key words of a correct answer."""
+    forms, graded = alternative_forms(answer)
+    keywords = tuple(
+        tuple(token for token in form.split() if len(token) > SHORT_TOKEN_LENGTH) or tuple(form.split())
+        for form in sorted(graded)
+    )
+    return CompiledAnswer(forms, keywords)
+
+
+class AnswerMatcher:
+    """Grade typed answers against precompiled correct answers.
+
+    An answer that is verbatim the name of another known structure is
+    rejected even if it shares enough key words with the correct one.
+    """
+
+    def __init__(self, answers: Iterable[str] = ()):
+        self._compiled: Dict[str, CompiledAnswer] = {answer: compile_answer(answer) for answer in answers}
+        # Every verbatim form of the known answers
+        self._known_forms: FrozenSet[str] = frozenset(
+            form for compiled in self._compiled.values() for form in compiled.forms
+        )
+
+    def compiled(self, correct_answer: str) -> CompiledAnswer:
+        """Return the compiled form of an answer, compiling unknown answers on the fly."""
+        compiled = self._compiled.get(correct_answer)
+        if compiled is None:
+            compiled = self._compiled[correct_answer] = compile_answer(correct_answer)
+        return compiled
+
+    def score(self, user_answer: str, correct_answer: str) -> float:
+        """Return the share (0-1) of key words of the best matching form found in the answer."""
+        user_tokens = tokenize(fold(user_answer))
+        if not user_tokens:
+            return 0.0
+        compiled = self.compiled(correct_answer)
+        user_form = " ".join(user_tokens)
+        if user_form in compiled.forms:
+            return 1.0
+        if user_form in self._known_forms:
+            return 0.0
+        # "supra epineuse" may also stand for "supra-epineuse"
+        user_set = set(user_tokens) | {f"{a}-{b}" for a, b in zip(user_tokens, user_tokens[1:])}
+        best = 0.0
+        for keywords in compiled.keywords:
+            matches = sum(1 for keyword in keywords if self._token_matches(keyword, user_set))
+            best = max(best, matches / len(keywords))
+        return best
+
+    def check(self, user_answer: str, correct_answer: str) -> bool:
+        """Return True if the answer is accepted."""
+        return self.score(user_answer, correct_answer) >= KEYWORD_RATIO
+
+    def check_many(self, user_answers: Iterable[str], correct_answers: Iterable[str]) -> List[bool]:
+        """Grade a batch of answers against their correct answers in one pass."""
+        return [self.score(user, correct) >= KEYWORD_RATIO for user, correct in zip(user_answers, correct_answers)]
+
+    @staticmethod
+    def _token_matches(keyword: str, user_tokens: set) -> bool:
+        if keyword in user_tokens:
+            return True
+        budget = typo_budget(len(keyword))
+        return budget > 0 and any(
+            bounded_edit_distance(keyword, token, budget) <= budget for token in user_tokens
+        )
+
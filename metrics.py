@@ -0,0 +1,205 @@
+"""Low-overhead timing histograms and counters, in Prometheus text format.
+
+Metrics are off unless ``OSTEO_METRICS`` is set. When off, ``timed``
+returns the function unchanged and the other helpers return at once, so
+the instrumented code runs as if it were not instrumented.
+
+When on, the metrics can be exposed in two ways:
+
+- ``OSTEO_METRICS_PORT=9108`` serves them at http://127.0.0.1:9108/metrics
+- ``OSTEO_METRICS_FILE=metrics.prom`` rewrites that file every
+  ``OSTEO_METRICS_INTERVAL`` seconds (15 by default)
+"""
+
+import bisect
+import functools
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Tuple
+
+ENABLED = os.environ.get("OSTEO_METRICS", "").lower() not in ("", "0", "false", "no")
+METRICS_PORT = os.environ.get("OSTEO_METRICS_PORT")
+METRICS_FILE = os.environ.get("OSTEO_METRICS_FILE")
+METRICS_INTERVAL = float(os.environ.get("OSTEO_METRICS_INTERVAL", "15"))
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency buckets, from 50 µs to 10 s
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+# A session is active if it reran within this many seconds
+ACTIVE_SESSION_WINDOW = 300.0
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations."""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # One slot per bucket plus the +Inf one
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+
+class Registry:
+    """Named histograms, counters and gauges, rendered in Prometheus text format."""
+
+    def __init__(self):
+        # name -> {label value -> histogram}
+        self.histograms: Dict[str, Dict[str, Histogram]] = {}
+        self.counters: Dict[str, int] = {}
+        self.help: Dict[str, str] = {}
+        # Called at render time; each returns (name, help, value) gauges
+        self.collectors: List[Callable[[], Iterable[Tuple[str, str, float]]]] = []
+        self.sessions: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, label: str, help_text: str = "") -> Histogram:
+        with self._lock:
+            family = self.histograms.setdefault(name, {})
+            if label not in family:
+                family[label] = Histogram()
+                self.help.setdefault(name, help_text)
+            return family[label]
+
+    def inc(self, name: str, value: int = 1, help_text: str = "") -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            self.help.setdefault(name, help_text)
+
+    def touch_session(self, session_key: int) -> None:
+        with self._lock:
+            self.sessions[session_key] = time.monotonic()
+
+    def active_sessions(self) -> int:
+        cutoff = time.monotonic() - ACTIVE_SESSION_WINDOW
+        with self._lock:
+            for key in [key for key, seen in self.sessions.items() if seen < cutoff]:
+                del self.sessions[key]
+            return len(self.sessions)
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            histograms = {name: dict(family) for name, family in self.histograms.items()}
+            counters = dict(self.counters)
+        for name, family in sorted(histograms.items()):
+            lines += [f"# HELP {name} {self.help.get(name, '')}", f"# TYPE {name} histogram"]
+            for label, histogram in sorted(family.items()):
+                counts, total, count = histogram.snapshot()
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{name}_bucket{{function="{label}",le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{function="{label}"}} {total}')
+                lines.append(f'{name}_count{{function="{label}"}} {count}')
+        for name, value in sorted(counters.items()):
+            lines += [f"# HELP {name} {self.help.get(name, '')}", f"# TYPE {name} counter", f"{name} {value}"]
+        gauges = [("osteo_active_sessions", "Sessions that reran in the last 5 minutes", self.active_sessions())]
+        for collector in self.collectors:
+            gauges.extend(collector())
+        for name, help_text, value in gauges:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def timed(function: str) -> Callable:
+    """Decorator recording the duration of each call in ``osteo_call_seconds``."""
+    def decorator(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+        histogram = REGISTRY.histogram("osteo_call_seconds", function, "Duration of instrumented calls")
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def inc(name: str, help_text: str = "") -> None:
+    """Increment a counter."""
+    if ENABLED:
+        REGISTRY.inc(name, 1, help_text)
+
+
+def touch_session(session_key: int) -> None:
+    """Mark a session as active now."""
+    if ENABLED:
+        REGISTRY.touch_session(session_key)
+
+
+def add_collector(collector: Callable[[], Iterable[Tuple[str, str, float]]]) -> None:
+    """Register a function returning (name, help, value) gauges, evaluated at render time."""
+    if ENABLED:
+        REGISTRY.collectors.append(collector)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes would flood the Streamlit log
+
+
+def _dump_forever(path: str, interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(REGISTRY.render())
+        os.replace(tmp_path, path)
+
+
+def start_exporters() -> None:
+    """Start the HTTP endpoint and/or the periodic file dump configured in the environment."""
+    if not ENABLED:
+        return
+    if METRICS_PORT:
+        try:
+            server = ThreadingHTTPServer(("127.0.0.1", int(METRICS_PORT)), _MetricsHandler)
+        except OSError as error:
+            # With several server processes, only the first one can bind the port
+            logger.warning("Metrics endpoint disabled in process %d: port %s: %s", os.getpid(), METRICS_PORT, error)
+        else:
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    if METRICS_FILE:
+        threading.Thread(target=_dump_forever, args=(METRICS_FILE, METRICS_INTERVAL),
+                         name="metrics-dump", daemon=True).start()
@@ -1,523 +1,590 @@
 import streamlit as st
-import random
 import json
 import os
-import pickle
+import io
+import sqlite3
+import time
+from collections import deque
 from typing import Dict, List, Tuple
 from pathlib import Path
 
-# File to store persistent statistics
-STATS_FILE = "osteology_stats.pkl"
-
-# Anatomical data extracted from the PDF
-ANATOMICAL_DATA = {
-    "Scapula": {
-        "title": "Scapula gauche de cheval",
-        "views": ["Médiale", "Latérale"],
-        "image_files": ["scapula_mediale.png", "scapula_laterale.png"],
-        "components": {
-            1: "Cartilage scapulaire",
-            2: "Bord dorsal ou vertébral", 
-            3: "Angle crânial",
-            4: "Angle caudal",
-            5: "Fosse supra-épineuse",
-            6: "Fosse infra-épineuse",
-            7: "Tubérosité de l'épine scapulaire",
-            8: "Bord caudal ou axillaire",
-            9: "Bord crânial ou cervical",
-            10: "Empreintes d'insertions",
-            11: "Epine scapulaire",
-            12: "Incisure scapulaire",
-            13: "Foramen vasculaire",
-            14: "Col de la scapula",
-            15: "Empreinte vasculaire",
-            16: "Angle ventral ou articulaire",
-            17: "Tubérosité supra-glénoïdal",
-            18: "Cavité glénoïdale",
-            19: "Surface dentelée caudale",
-            20: "Surface dentelée crâniale",
-            21: "Fosse subscapulaire",
-            22: "Sillons vasculaires",
-            23: "Tubercule infra-glénoïdal",
-            24: "Processus coracoïde"
-        }
-    },
-    "Humérus": {
-        "title": "Humérus gauche de cheval",
-        "views": ["Crâniale", "Latérale", "Caudale", "Médiale"],
-        "image_files": ["humerus_craniale.png", "humerus_laterale.png", "humerus_caudale.png", "humerus_mediale.png"],
-        "components": {
-            1: "Tubercule mineur",
-            2: "Sillon intertuberculaire",
-            3: "Tubercule majeur",
-            4: "Foramens vasculaires",
-            5: "Face crâniale",
-            6: "Tubérosité deltoïdienne",
-            7: "Tubérosité du grand rond",
-            8: "Crête humérale",
-            9: "Face médiale",
-            10: "Face latérale : sillon brachial",
-            11: "Crête épicondylaire",
-            12: "Fosse coronoïdienne",
-            13: "Fosse radiale",
-            14: "Capitulum",
-            15: "Lèvre médiale",
-            16: "Fossette synoviale",
-            17: "Lèvre latérale",
-            18: "Tête articulaire",
-            19: "Ligne tricipitale",
-            20: "Tubérosité du petit rond",
-            21: "Face caudale",
-            22: "Crête humérale",
-            23: "Trochlée humérale",
-            24: "Epicondyle latéral",
-            25: "Fosse olécrânienne",
-            26: "Epicondyle médial",
-            27: "Col",
-            28: "Sillon brachial",
-            29: "Foramen nourricier",
-            30: "Capitulum"
-        }
-    },
-    "Radius et Ulna": {
-        "title": "Radius et ulna gauches de cheval",
-        "views": ["Dorsale", "Latérale", "Palmaire", "Médiale"],
-        "image_files": ["radius_ulna_dorsale.png", "radius_ulna_laterale.png", "radius_ulna_palmaire.png", "radius_ulna_mediale.png"],
-        "components": {
-            1: "Tubérosité de l'olécrâne",
-            2: "Bord crânial de l'olécrâne",
-            3: "Processus anconé",
-            4: "Incisure trochléaire",
-            5: "Fossette synoviale",
-            6: "Processus coronoïde",
-            7: "Relief latéral d'insertion",
-            8: "Tubérosité du radius",
-            9: "Col du radius",
-            10: "Bord caudal de l'olécrâne",
-            11: "Espace interosseux",
-            12: "Sillon tendineux",
-            13: "Corps de l'ulna",
-            14: "Bord latéral du radius",
-            15: "Face dorsale du radius",
-            16: "Face palmaire du radius",
-            17: "Sillon pour l'ext. oblique du carpe",
-            18: "Sillon pour l'ext. radial du carpe",
-            19: "Sillon pour l'ext. dorsal du doigt",
-            20: "Sillon pour l'ext. latéral du doigt",
-            21: "Surface articulaire pour le carpe",
-            22: "Rudiment de proc. styloïde radial",
-            23: "Crête transverse",
-            24: "Rudiment de proc. ulnaire"
-        }
-    },
-    "Carpe": {
-        "title": "Carpe gauche de cheval",
-        "views": ["Dorsale", "Latérale", "Médiale", "Dorsale (os disjoints)"],
-        "image_files": ["carpe_dorsale.png", "carpe_laterale.png", "carpe_mediale.png", "carpe_dorsale_disjoints.png"],
-        "components": {
-            1: "Radius (extrémité distale)",
-            2: "Sillon pour l'ext. radial carpe",
-            3: "Sillon pour l'ext. dorsal du doigt",
-            4: "Sillon pour l'ext. oblique du carpe",
-            5: "Os scaphoïde",
-            6: "Os pyramidal",
-            7: "Os lunatum",
-            8: "Os capitatum",
-            9: "Os trapézoïde",
-            10: "Os hamatum",
-            11: "Tubérosité dorso-médiale",
-            12: "Métacarpien IV",
-            13: "Métacarpien II",
-            14: "Métacarpien principal (III)",
-            15: "Sillon pour l'ext. latéral du doigt",
-            16: "Crête transverse",
-            17: "Sillon pour le tendon long du m. ulnaire latérale",
-            18: "Os pisiforme",
-            19: "Facette articulaire répondant au radius",
-            20: "Facette articulaire pour l'os pyramidal"
-        }
-    },
-    "Métacarpe": {
-        "title": "Métacarpe gauche de cheval",
-        "views": ["Dorsale", "Latérale", "Palmaire (os disjoints)"],
-        "image_files": ["metacarpe_dorsale.png", "metacarpe_laterale.png", "metacarpe_palmaire.png"],
-        "components": {
-            1: "Tubérosité dorso-médiale",
-            2: "Métacarpien IV",
-            3: "Métacarpien II",
-            4: "Métacarpien principal (III)",
-            5: "Bord médial du métacarpien principal (III)",
-            6: "Bord latéral du métacarpien principal (III)",
-            7: "Fossette d'insertion ligamenteuse",
-            8: "Condyle latéral",
-            9: "Condyle médiale",
-            10: "Relief intermédiaire",
-            11: "Surface articulaire proximale",
-            12: "Bouton terminal de l'os métacarpien IV",
-            13: "Surface articulaire pour l'os hamatum",
-            14: "Surface articulaire pour l'os capitatum",
-            15: "Surface articulaire pour l'os trapézoïde",
-            16: "Surfaces articulaires intermétacarpiennes (IV et III)",
-            17: "Surfaces articulaires intermétacarpiennes (II et III)",
-            18: "Empreinte d'insertion du m. interosseux",
-            19: "Surface de syndesmose intermétacarpienne",
-            20: "Foramen nourricier",
-            21: "Face palmaire",
-            22: "Bord médial",
-            23: "Bouton terminal"
-        }
-    },
-    "Phalanges": {
-        "title": "Os du doigt de cheval",
-        "views": ["Latérale", "Proximale", "Dorsale", "Distale"],
-        "image_files": ["phalanges_laterale.png", "phalanges_proximale.png", "phalanges_dorsale.png", "phalanges_distale.png"],
-        "components": {
-            1: "Métacarpien principal (III)",
-            2: "Phalange proximale",
-            3: "Os grands sésamoïdes",
-            4: "Phalange moyenne",
-            5: "Processus extensorius",
-            6: "Phalange distale",
-            7: "Processus basilaire",
-            8: "Incisure du processus palmaire",
-            9: "Processus rétrossal",
-            10: "Processus extensorius",
-            11: "Bord coronaire",
-            12: "Face dorsale ou pariétale",
-            13: "Surface articulaire",
-            14: "Os naviculaire ou petit sésamoïde",
-            15: "Incisure du processus palmaire",
-            16: "Processus basilaire",
-            17: "Empreinte d'insertion ligamenteuse",
-            18: "Foramens vasculaires",
-            19: "Processus rétrossal",
-            20: "Bord solaire",
-            21: "Sillon pariétal",
-            22: "Cavité glénoïdale (glène) latérale",
-            23: "Echancrure médiane du bord solaire",
-            24: "Cavité glénoïdale (glène) médiale",
-            25: "Processus palmaire"
-        }
-    },
-    "Vertèbres Cervicales": {
-        "title": "Vertèbres cervicales de cheval",
-        "views": ["Latérale", "Dorsale", "Ventrale"],
-        "image_files": ["vertebres_cervicales_laterale.png", "vertebres_cervicales_dorsale.png", "vertebres_cervicales_ventrale.png"],
-        "components": {
-            1: "Processus épineux",
-            2: "Processus articulaire crânial",
-            3: "Processus articulaire caudal",
-            4: "Incisure vertébrale crâniale",
-            5: "Incisure vertébrale caudale",
-            6: "Foramen transversaire",
-            7: "Tubercule dorsal du processus transverse",
-            8: "Tête de la vertèbre",
-            9: "Processus transverse",
-            10: "Tubercule ventral",
-            11: "Dent de l'axis",
-            12: "Fosse de la vertèbre"
-        }
-    },
-    "Fémur": {
-        "title": "Fémur de cheval",
-        "views": ["Crâniale", "Caudale", "Médiale", "Latérale"],
-        "image_files": ["femur_craniale.png", "femur_caudale.png", "femur_mediale.png", "femur_laterale.png"],
-        "components": {
-            1: "Sommet du grand trochanter",
-            2: "Convexité du grand trochanter",
-            3: "Incisure trochantérique",
-            4: "Tête du fémur",
-            5: "Col du fémur",
-            6: "Crête du grand trochanter",
-            7: "Fovea capitis",
-            8: "Crête intertrochantérique",
-            9: "Troisième trochanter",
-            10: "Petit trochanter",
-            11: "Face médiale",
-            12: "Bord crânial",
-            13: "Face latérale",
-            14: "Empreinte des vaisseaux fémoraux",
-            15: "Tubérosité supracondylaire",
-            16: "Foramen nourricier",
-            17: "Tubérosité de la trochlée",
-            18: "Epicondyle médial",
-            19: "Epicondyle latéral",
-            20: "Condyle médial",
-            21: "Lèvre médiale de la trochlée",
-            22: "Condyle latéral",
-            23: "Lèvre latérale de la trochlée",
-            24: "Gorge de la trochlée",
-            25: "Fossette du m. poplité",
-            26: "Fosse intercondylaire"
-        }
-    },
-    "Tibia et Fibula": {
-        "title": "Tibia et fibula gauches de cheval",
-        "views": ["Crâniale", "Caudale", "Latérale", "Médiale"],
-        "image_files": ["tibia_fibula_craniale.png", "tibia_fibula_caudale.png", "tibia_fibula_laterale.png", "tibia_fibula_mediale.png"],
-        "components": {
-            1: "Condyle médial",
-            2: "Eminence intercondylaire",
-            3: "Condyle latéral",
-            4: "Tubérosité du tibia",
-            5: "Sillon de la tubérosité",
-            6: "Sillon de l'extenseur",
-            7: "Fosse du tibia",
-            8: "Fibula",
-            9: "Crête du tibia",
-            10: "Espace interosseux",
-            11: "Face médiale",
-            12: "Face latérale",
-            13: "Bord crânial",
-            14: "Face caudale",
-            15: "Malléole médiale",
-            16: "Malléole latérale",
-            17: "Surface articulaire distale (cochlée tibiale)"
-        }
-    }
-}
+from assets import AssetManifest, scan_assets
+from catalog import CATALOG_FILE, Catalog, load_catalog
+from distractors import DistractorIndex
+from event_log import AnswerEvent, get_event_log
+from hotspots import HotspotIndex, render_highlight
+from image_cache import ImageBytesCache
+from image_pipeline import resolve_image_path, resolve_overlay_path
+import metrics
+from matcher import KEYWORD_RATIO, AnswerMatcher
+from quiz_session import QuizSession
+from sampler import QuestionSampler
+from scheduler import QUALITY_CORRECT, QUALITY_SKIPPED, QUALITY_WRONG, CardState, Scheduler
+try:
+    from streamlit_image_coordinates import streamlit_image_coordinates
+except ImportError:  # optional: only needed by the "click the structure" mode
+    streamlit_image_coordinates = None
+from PIL import Image
+from stats_store import (
+    DEFAULT_USER, StatsStore, WriteBehindStatsStore, create_stats_store, empty_stats, migrate_pickle_stats
+)
+
+# Legacy pickle statistics file, migrated into the stats store on first start
+STATS_FILE = os.environ.get("OSTEO_STATS_FILE", "osteology_stats.pkl")
+# Persistent statistics backend ("sqlite" or "memory") and its database file
+STATS_BACKEND = os.environ.get("OSTEO_STATS_BACKEND", "sqlite")
+STATS_DB = os.environ.get("OSTEO_STATS_DB", "osteology_stats.db")
+# Write-behind buffering: flush after this many answers or this many seconds
+STATS_FLUSH_SIZE = 50
+STATS_FLUSH_INTERVAL = 5.0
+# Width (px) of the image column; the smallest pre-built variant at least this wide is served
+IMAGE_DISPLAY_WIDTH = 720
+# Memory budget of the process-wide image cache
+IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Lazy views: only send the selected view to the browser, prefetch the others server-side
+LAZY_VIEWS = True
+# Number of recent questions that are not asked again while other structures are available
+NO_REPEAT_WINDOW = 5
+# Question selection modes
+RANDOM_MODE = "Aléatoire"
+SPACED_REPETITION_MODE = "Répétition espacée"
+CLICK_MODE = "Cliquer sur la structure"
+EXAM_MODE = "Examen"
+MULTIPLE_CHOICE_MODE = "Choix multiple"
+EXAM_SIZES = (10, 20, 30)
+
+def get_catalog() -> Catalog:
+    """Return the anatomical catalog, loaded once per process and reloaded when the file changes."""
+    return load_catalog(CATALOG_FILE)
+
+@st.cache_resource(max_entries=4)
+def scan_asset_manifest(image_folder: str, catalog_mtime: int) -> AssetManifest:
+    """Scan the image folder once per catalog version."""
+    return scan_assets(get_catalog(), image_folder)
+
+def get_asset_manifest(image_folder: str = "images") -> AssetManifest:
+    """Return the manifest of the images available for the current catalog."""
+    return scan_asset_manifest(image_folder, get_catalog().mtime)
+
+@st.cache_resource(max_entries=64)
+def build_question_sampler(selected_bones: Tuple[str, ...], catalog_mtime: int, located_only: bool = False) -> QuestionSampler:
+    """Build the sampler of the structure IDs of a bone selection once and share it between sessions.
+
+    With ``located_only``, only structures placed on an image are drawn.
+    """
+    catalog = get_catalog()
+    return QuestionSampler([
+        structure_id for structure_id, pair in enumerate(catalog.pairs)
+        if pair[0] in selected_bones and (not located_only or pair in catalog.located)
+    ])
 
+@st.cache_resource
+def get_stats_store() -> StatsStore:
+    """Create the process-wide statistics store, migrating the legacy pickle file."""
+    backend = create_stats_store(STATS_BACKEND, STATS_DB)
+    migrate_pickle_stats(STATS_FILE, backend)
+    # Answers only touch memory; deltas reach the backend from a background thread
+    return WriteBehindStatsStore(backend, max_pending=STATS_FLUSH_SIZE, flush_interval=STATS_FLUSH_INTERVAL)
+
+@st.cache_resource
+def start_metrics() -> bool:
+    """Start the metrics exporters once per process (only if metrics are enabled)."""
+    def cache_gauges():
+        image_stats = get_image_cache().stats()
+        store = get_stats_store()
+        return [
+            ("osteo_image_cache_hits", "Image cache hits", image_stats["hits"]),
+            ("osteo_image_cache_misses", "Image cache misses", image_stats["misses"]),
+            ("osteo_image_cache_bytes", "Bytes held by the image cache", image_stats["bytes"]),
+            ("osteo_stats_cache_hits", "Stats loads served from memory", store.cache_hits),
+            ("osteo_stats_cache_misses", "Stats loads read from the backend", store.cache_misses),
+        ]
+    metrics.add_collector(cache_gauges)
+    metrics.start_exporters()
+    return metrics.ENABLED
+
+def get_user_id() -> str:
+    """Return the identifier of the current user (``?user=...`` in the URL)."""
+    return st.query_params.get("user", DEFAULT_USER)
+
+@metrics.timed("load_persistent_stats")
 def load_persistent_stats():
-    """Load statistics from file."""
+    """Load the current user's statistics from the stats store."""
     try:
-        if os.path.exists(STATS_FILE):
-            with open(STATS_FILE, 'rb') as f:
-                stats = pickle.load(f)
-            return stats
-        else:
-            return {
-                'total_score': 0,
-                'total_questions': 0,
-                'best_streak': 0,
-                'sessions_played': 0,
-                'last_celebration_streak': 0
-            }
-    except:
-        return {
-            'total_score': 0,
-            'total_questions': 0,
-            'best_streak': 0,
-            'sessions_played': 0,
-            'last_celebration_streak': 0
-        }
-
-def save_persistent_stats():
-    """Save statistics to file."""
+        return get_stats_store().load(get_user_id())
+    except sqlite3.Error:
+        return empty_stats()
+
+@metrics.timed("load_all_users_stats")
+def load_all_users_stats():
+    """Load the statistics summed over every user, as written by all server processes."""
+    try:
+        return get_stats_store().totals()
+    except sqlite3.Error:
+        return None
+
+@metrics.timed("save_persistent_stats")
+def save_persistent_stats(**delta):
+    """Apply a delta (counters are added, best streak is maxed) to the current user's statistics."""
     try:
-        stats = {
-            'total_score': st.session_state.get('persistent_total_score', 0),
-            'total_questions': st.session_state.get('persistent_total_questions', 0),
-            'best_streak': st.session_state.get('persistent_best_streak', 0),
-            'sessions_played': st.session_state.get('persistent_sessions_played', 0),
-            'last_celebration_streak': st.session_state.get('last_celebration_streak', 0)
-        }
-        with open(STATS_FILE, 'wb') as f:
-            pickle.dump(stats, f)
-    except:
+        get_stats_store().update(get_user_id(), delta)
+    except sqlite3.Error:
         pass  # Fail silently if can't save
 
+def log_answer(bone_group: str, component_number: int, correct: bool, skipped: bool = False, matched: int = None,
+               latency: float = None):
+    """Append the outcome of the current question to the answer log (``matched``: structure named instead)."""
+    now = time.time()
+    if latency is None:
+        latency = now - (get_session().question_started_at or now)
+    try:
+        get_event_log().append(AnswerEvent(
+            now, get_user_id(), bone_group, component_number, correct, skipped, round(latency, 3), matched
+        ))
+    except OSError:
+        pass  # The log is for analysis only: never block the quiz on it
+
 def show_celebration_message():
     """Show Ernesto's celebration message."""
     st.success("🎉 Wow Caro! You're going great! Keep pushing ❤️\n\nYours Ernesto")
     st.balloons()
 
-def initialize_session_state():
-    """Initialize session state variables."""
-    # Load persistent stats
-    persistent_stats = load_persistent_stats()
-    
-    # Session-specific stats
-    if 'score' not in st.session_state:
-        st.session_state.score = 0
-    if 'total_questions' not in st.session_state:
-        st.session_state.total_questions = 0
-    if 'current_question' not in st.session_state:
-        st.session_state.current_question = None
-    if 'answer_submitted' not in st.session_state:
-        st.session_state.answer_submitted = False
-    if 'selected_bones' not in st.session_state:
-        st.session_state.selected_bones = list(ANATOMICAL_DATA.keys())
-    if 'streak' not in st.session_state:
-        st.session_state.streak = 0
-    if 'best_streak' not in st.session_state:
-        st.session_state.best_streak = 0
-    
-    # Persistent stats
-    if 'persistent_total_score' not in st.session_state:
-        st.session_state.persistent_total_score = persistent_stats['total_score']
-    if 'persistent_total_questions' not in st.session_state:
-        st.session_state.persistent_total_questions = persistent_stats['total_questions']
-    if 'persistent_best_streak' not in st.session_state:
-        st.session_state.persistent_best_streak = persistent_stats['best_streak']
-    if 'persistent_sessions_played' not in st.session_state:
-        st.session_state.persistent_sessions_played = persistent_stats['sessions_played']
-    if 'last_celebration_streak' not in st.session_state:
-        st.session_state.last_celebration_streak = persistent_stats['last_celebration_streak']
-    
-    # Mark as new session if this is the first time
-    if 'session_initialized' not in st.session_state:
-        st.session_state.persistent_sessions_played += 1
-        st.session_state.session_initialized = True
-        save_persistent_stats()
-
-def generate_question(selected_bones: List[str]) -> Tuple[str, int, str, str]:
-    """Generate a random question from selected bone groups."""
-    bone_group = random.choice(selected_bones)
-    bone_data = ANATOMICAL_DATA[bone_group]
-    component_number = random.choice(list(bone_data["components"].keys()))
-    correct_answer = bone_data["components"][component_number]
-    
-    return bone_group, component_number, correct_answer, bone_data["title"]
+@metrics.timed("initialize_session_state")
+def initialize_session_state() -> QuizSession:
+    """Create the session's quiz state on its first run and return it."""
+    catalog = get_catalog()
+    if 'quiz' not in st.session_state:
+        st.session_state.quiz = QuizSession(
+            list(catalog.bones.keys()), deque(maxlen=NO_REPEAT_WINDOW), catalog.mtime,
+            last_celebration_streak=load_persistent_stats()['last_celebration_streak'],
+        )
+        # Count the new session
+        save_persistent_stats(sessions_played=1)
+    quiz = st.session_state.quiz
+    if quiz.catalog_mtime != catalog.mtime:
+        # Structure IDs are catalog positions: forget those of an older catalog
+        quiz.question_id = None
+        quiz.next_question_id = None
+        # A running exam refers to the old positions too: drop it
+        quiz.exam = quiz.exam_answers = quiz.exam_results = None
+        quiz.choices = None
+        quiz.recent.clear()
+        quiz.scheduler_selection = ()
+        quiz.catalog_mtime = catalog.mtime
+    return quiz
 
-def normalize_answer(answer: str) -> str:
-    """Normalize answer for comparison (remove accents, lowercase, etc.)."""
-    return answer.lower().strip().replace("é", "e").replace("è", "e").replace("ê", "e").replace("à", "a").replace("ô", "o").replace("ç", "c")
+def get_session() -> QuizSession:
+    """Return the current session's quiz state."""
+    return st.session_state.quiz
 
+@metrics.timed("generate_question")
+def generate_question(selected_bones: List[str], recent: deque = None, located_only: bool = False) -> int:
+    """Return a random structure ID, uniformly over all structures of the selected bone groups.
+
+    Structures in ``recent`` are avoided and the new one is appended to it.
+    """
+    sampler = build_question_sampler(tuple(sorted(selected_bones)), get_catalog().mtime, located_only)
+    return sampler.sample(recent)
+
+def get_scheduler() -> Scheduler:
+    """Return the session's spaced-repetition scheduler over the selected bone groups."""
+    quiz = get_session()
+    selection = tuple(sorted(quiz.selected_bones))
+    if quiz.scheduler_selection != selection:
+        try:
+            cards = get_stats_store().load_cards(get_user_id())
+        except sqlite3.Error:
+            cards = {}
+        keys = [pair for pair in get_catalog().pairs if pair[0] in selection]
+        quiz.scheduler = Scheduler({key: CardState(*card) for key, card in cards.items()}, keys)
+        quiz.scheduler_selection = selection
+    return quiz.scheduler
+
+def next_question() -> int:
+    """Return the next structure ID, the one prepared in advance if it is still valid."""
+    quiz = get_session()
+    # Answer latency is measured from here
+    quiz.question_started_at = time.time()
+    # The choices shown belong to the previous question, even if it is among them
+    quiz.choices = None
+    prepared, quiz.next_question_id = quiz.next_question_id, None
+    if prepared is not None and quiz.next_question_key == next_question_key():
+        return prepared
+    return choose_question()
+
+def next_question_key() -> Tuple[str, ...]:
+    """Return what the choice of the next question depends on: the mode and the selected bone groups."""
+    return (st.session_state.get('question_mode'), *sorted(get_session().selected_bones))
+
+@metrics.timed("prepare_next_question")
+def prepare_next_question():
+    """Pick the next question now and warm its images in the server cache, so showing it is instant."""
+    quiz = get_session()
+    key = next_question_key()
+    if quiz.next_question_id is not None and quiz.next_question_key == key:
+        return
+    quiz.next_question_id = choose_question()
+    quiz.next_question_key = key
+    bone_group, number = get_catalog().pairs[quiz.next_question_id]
+    prefetch_images(bone_group, number)
+
+def choose_question() -> int:
+    """Pick a structure ID: the most overdue structure in spaced-repetition mode, else a random one."""
+    quiz = get_session()
+    catalog = get_catalog()
+    if st.session_state.get('question_mode') == CLICK_MODE and any(
+        pair[0] in quiz.selected_bones for pair in catalog.located
+    ):
+        return generate_question(quiz.selected_bones, quiz.recent, located_only=True)
+    if st.session_state.get('question_mode') == SPACED_REPETITION_MODE:
+        due = get_scheduler().next_due()
+        if due is not None:
+            structure_id = catalog.pair_ids[due]
+            quiz.recent.append(structure_id)
+            return structure_id
+    return generate_question(quiz.selected_bones, quiz.recent)
+
+def record_review(bone_group: str, component_number: int, quality: int):
+    """Update and persist the memory state of a structure after an answer."""
+    record_reviews([((bone_group, component_number), quality)])
+
+def record_reviews(reviews: List[Tuple[Tuple[str, int], int]]):
+    """Update the memory state of several structures and persist them in one write."""
+    scheduler = get_scheduler()
+    cards = {key: tuple(scheduler.record(key, quality)) for key, quality in reviews}
+    try:
+        get_stats_store().save_cards(get_user_id(), cards)
+    except sqlite3.Error:
+        pass  # Fail silently if can't save
+
+@st.cache_resource(max_entries=4)
+def build_answer_matcher(catalog_mtime: int) -> AnswerMatcher:
+    """Compile every answer of the catalog once per catalog version."""
+    catalog = get_catalog()
+    return AnswerMatcher(catalog.answer(bone_group, number) for bone_group, number in catalog.pairs)
+
+@st.cache_resource(max_entries=4)
+def build_distractor_index(catalog_mtime: int) -> DistractorIndex:
+    """Index the distractors of every structure once per catalog version."""
+    return DistractorIndex(get_catalog())
+
+@metrics.timed("check_answer")
 def check_answer(user_answer: str, correct_answer: str) -> bool:
-    """Check if the user's answer matches the correct answer."""
-    user_normalized = normalize_answer(user_answer)
-    correct_normalized = normalize_answer(correct_answer)
-    
-    # Check exact match first
-    if user_normalized == correct_normalized:
-        return True
-    
-    # Check if user answer contains key words from correct answer
-    correct_words = correct_normalized.split()
-    user_words = user_normalized.split()
-    
-    # If user provides at least 60% of the important words, consider it correct
-    important_words = [w for w in correct_words if len(w) > 3]  # Words longer than 3 chars
-    if important_words:
-        matches = sum(1 for word in important_words if word in user_words)
-        return matches >= len(important_words) * 0.6
-    
-    return False
+    """Check if the user's answer matches the correct answer (accents optional, small typos tolerated)."""
+    return build_answer_matcher(get_catalog().mtime).check(user_answer, correct_answer)
+
+def generate_exam(selected_bones: List[str], size: int) -> Tuple[int, ...]:
+    """Draw the structure IDs of an exam, without repeats when the selection is large enough."""
+    recent = deque(maxlen=size)
+    return tuple(generate_question(selected_bones, recent) for _ in range(size))
+
+def identify_answer(bone_group: str, user_answer: str):
+    """Return the number of the structure of the bone group that the answer names best, or None."""
+    catalog = get_catalog()
+    matcher = build_answer_matcher(catalog.mtime)
+    best, best_score = None, KEYWORD_RATIO
+    for number, name in catalog.bones[bone_group]["components"].items():
+        score = matcher.score(user_answer, name)
+        if score > best_score or (best is None and score >= best_score):
+            best, best_score = number, score
+    return best
 
 def reset_game():
     """Reset game statistics."""
-    st.session_state.score = 0
-    st.session_state.total_questions = 0
-    st.session_state.current_question = None
-    st.session_state.answer_submitted = False
-    st.session_state.streak = 0
+    quiz = get_session()
+    quiz.score = 0
+    quiz.total_questions = 0
+    quiz.question_id = None
+    quiz.answer_submitted = False
+    quiz.streak = 0
 
 def reset_all_stats():
     """Reset all statistics including persistent ones."""
     # Reset session stats
     reset_game()
+    quiz = get_session()
+    quiz.last_celebration_streak = 0
+    # The schedule (and a question picked from it) came from the deleted cards: rebuild it on next use
+    quiz.scheduler = None
+    quiz.scheduler_selection = ()
+    quiz.next_question_id = None
     
-    # Reset persistent stats
-    st.session_state.persistent_total_score = 0
-    st.session_state.persistent_total_questions = 0
-    st.session_state.persistent_best_streak = 0
-    st.session_state.persistent_sessions_played = 0
-    st.session_state.last_celebration_streak = 0
-    
-    # Delete the stats file
+    # Delete the user's stored stats
     try:
-        if os.path.exists(STATS_FILE):
-            os.remove(STATS_FILE)
-    except:
+        get_stats_store().reset(get_user_id())
+    except sqlite3.Error:
         pass  # Fail silently if can't delete
-    
-    # Save empty stats
-    save_persistent_stats()
 
-def display_anatomical_image(bone_group: str, image_folder: str = "images"):
-    """Display anatomical images for the given bone group."""
-    bone_data = ANATOMICAL_DATA[bone_group]
+@st.cache_resource
+def get_image_cache() -> ImageBytesCache:
+    """Create the process-wide cache of image bytes shared by every session."""
+    return ImageBytesCache(max_bytes=IMAGE_CACHE_MAX_BYTES)
+
+@st.cache_resource(max_entries=256)
+def highlighted_image(image_path: str, point: Tuple[float, float]) -> bytes:
+    """Render an image with a structure's location highlighted."""
+    fmt = "WEBP" if image_path.endswith(".webp") else "JPEG" if image_path.endswith(".jpg") else "PNG"
+    return render_highlight(get_image_cache().get(image_path), point, fmt=fmt)
+
+@st.cache_resource(max_entries=256)
+def get_hotspot_index(bone_group: str, image_file: str, image_path: str, catalog_mtime: int) -> HotspotIndex:
+    """Build the spatial index of a view's hotspots once per served image variant."""
+    with Image.open(io.BytesIO(get_image_cache().get(image_path))) as image:
+        width, height = image.size
+    hotspots = get_catalog().bones[bone_group].get("hotspots", {}).get(image_file, {})
+    return HotspotIndex(hotspots, width, height)
+
+def prefetch_images(bone_group: str, highlighted_number: int = None, image_folder: str = "images",
+                    skip: int = None):
+    """Load a bone group's displayed images (circled ones where located) in the background, except view ``skip``."""
+    catalog = get_catalog()
+    manifest = get_asset_manifest(image_folder)
+    get_image_cache().prefetch(
+        (catalog.hotspot(bone_group, image_file, highlighted_number) is not None
+         and resolve_overlay_path(image_file, highlighted_number, IMAGE_DISPLAY_WIDTH))
+        or resolve_image_path(image_file, IMAGE_DISPLAY_WIDTH, image_folder)
+        for i, image_file in enumerate(catalog.bones[bone_group].get("image_files", []))
+        if i != skip and manifest.has(image_file)
+    )
+
+def show_image(image_file: str, caption: str, image_folder: str = "images",
+               highlight: Tuple[int, Tuple[float, float]] = None):
+    """Display one anatomical image, served from the in-memory image cache.
+
+    ``highlight`` is a structure number and its relative (x, y) position, to
+    circle on the image. The prerendered highlighted variant is served when
+    the asset build made one; otherwise it is rendered once and cached.
+    """
+    manifest = get_asset_manifest(image_folder)
+    if not manifest.folder_exists:
+        st.error(f"📁 Dossier d'images '{image_folder}' introuvable. Veuillez créer le dossier et y ajouter les images anatomiques.")
+        return
+    if not manifest.has(image_file):
+        st.warning(f"Image manquante: {image_file}")
+        return
+    image_path = resolve_image_path(image_file, IMAGE_DISPLAY_WIDTH, image_folder)
+    overlay_path = highlight and resolve_overlay_path(image_file, highlight[0], IMAGE_DISPLAY_WIDTH)
+    image_bytes = get_image_cache().get(overlay_path or image_path)
+    if image_bytes is not None and highlight is not None and overlay_path is None:
+        image_bytes = highlighted_image(image_path, highlight[1])
+    if image_bytes is not None:
+        st.image(image_bytes, caption=caption, use_container_width=True)
+    else:
+        st.warning(f"Image manquante: {image_file}")
+
+@metrics.timed("display_anatomical_image")
+def display_anatomical_image(bone_group: str, image_folder: str = "images", highlighted_number: int = None):
+    """Display anatomical images for the given bone group, circling ``highlighted_number`` where it is located."""
+    catalog = get_catalog()
+    bone_data = catalog.bones[bone_group]
     image_files = bone_data.get("image_files", [])
     
     if not image_files:
         st.warning(f"Aucune image configurée pour {bone_group}")
         return
     
-    # Check if images folder exists
-    if not os.path.exists(image_folder):
-        st.error(f"📁 Dossier d'images '{image_folder}' introuvable. Veuillez créer le dossier et y ajouter les images anatomiques.")
-        return
+    def highlight(image_file):
+        point = None if highlighted_number is None else catalog.hotspot(bone_group, image_file, highlighted_number)
+        return None if point is None else (highlighted_number, point)
     
     # Display images in tabs or columns depending on number
     if len(image_files) == 1:
         # Single image
-        image_path = os.path.join(image_folder, image_files[0])
-        if os.path.exists(image_path):
-            st.image(image_path, caption=f"{bone_data['title']} - {bone_data['views'][0]}", use_container_width=True)
-        else:
-            st.warning(f"Image manquante: {image_files[0]}")
+        show_image(image_files[0], f"{bone_data['title']} - {bone_data['views'][0]}", image_folder, highlight(image_files[0]))
+    
+    elif LAZY_VIEWS:
+        # Only the selected view is transferred; the others are warmed in the server cache
+        located = catalog.located.get((bone_group, highlighted_number), [])
+        selected_view = st.radio(
+            "Vue:", bone_data['views'], horizontal=True,
+            index=image_files.index(located[0]) if located else 0,
+            label_visibility="collapsed", key=f"view_selector_{bone_group}"
+        )
+        view_index = bone_data['views'].index(selected_view)
+        show_image(image_files[view_index], f"{bone_data['title']} - {selected_view}", image_folder, highlight(image_files[view_index]))
+        prefetch_images(bone_group, highlighted_number, image_folder, skip=view_index)
     
     elif len(image_files) <= 4:
         # Multiple images in tabs
         tabs = st.tabs(bone_data['views'])
-        for i, (tab, image_file, view) in enumerate(zip(tabs, image_files, bone_data['views'])):
+        for tab, image_file, view in zip(tabs, image_files, bone_data['views']):
             with tab:
-                image_path = os.path.join(image_folder, image_file)
-                if os.path.exists(image_path):
-                    st.image(image_path, caption=f"{bone_data['title']} - {view}", use_container_width=True)
-                else:
-                    st.warning(f"Image manquante: {image_file}")
+                show_image(image_file, f"{bone_data['title']} - {view}", image_folder, highlight(image_file))
     
     else:
         # Too many images, use selectbox
         selected_view = st.selectbox("Choisir une vue:", bone_data['views'], key=f"view_selector_{bone_group}")
         view_index = bone_data['views'].index(selected_view)
-        image_file = image_files[view_index]
-        image_path = os.path.join(image_folder, image_file)
-        
-        if os.path.exists(image_path):
-            st.image(image_path, caption=f"{bone_data['title']} - {selected_view}", use_container_width=True)
-        else:
-            st.warning(f"Image manquante: {image_file}")
+        show_image(image_files[view_index], f"{bone_data['title']} - {selected_view}", image_folder, highlight(image_files[view_index]))
+
+def display_click_view(bone_group: str, component_number: int, image_folder: str = "images"):
+    """Show the view locating a structure as a clickable image; return the structure clicked, if any."""
+    catalog = get_catalog()
+    image_file = catalog.located[(bone_group, component_number)][0]
+    image_path = resolve_image_path(image_file, IMAGE_DISPLAY_WIDTH, image_folder)
+    image_bytes = get_image_cache().get(image_path) if get_asset_manifest(image_folder).has(image_file) else None
+    if image_bytes is None:
+        st.warning(f"Image manquante: {image_file}")
+        return None
+    image = Image.open(io.BytesIO(image_bytes))
+    click = streamlit_image_coordinates(image, key=f"click_{bone_group}_{component_number}")
+    if not click:
+        return None
+    # The click is in displayed pixels: scale it to the served variant
+    index = get_hotspot_index(bone_group, image_file, image_path, catalog.mtime)
+    scale = index.width / (click.get("width") or image.width)
+    return index.hit(click["x"] * scale, click["y"] * scale)
+
+# Shared styles of the bone diagram, so each number only carries a class
+DIAGRAM_CSS = """<style>
+@keyframes pulse {
+    0% { box-shadow: 0 4px 8px rgba(255,68,68,0.3); }
+    50% { box-shadow: 0 8px 16px rgba(255,68,68,0.6); }
+    100% { box-shadow: 0 4px 8px rgba(255,68,68,0.3); }
+}
+.osteo-diagram { border: 2px solid #1f77b4; border-radius: 10px; padding: 20px; background-color: #f8f9fa; text-align: center; }
+.osteo-diagram h3 { color: #1f77b4; margin-bottom: 20px; }
+.osteo-grid { display: flex; flex-wrap: wrap; justify-content: center; gap: 5px; max-width: 600px; margin: 0 auto; }
+.osteo-num { background-color: #e9ecef; color: #495057; border-radius: 50%; width: 35px; height: 35px; display: inline-flex; align-items: center; justify-content: center; font-weight: bold; margin: 3px; }
+.osteo-num.hl { background-color: #ff4444; color: white; width: 40px; height: 40px; font-size: 16px; box-shadow: 0 4px 8px rgba(255,68,68,0.3); animation: pulse 1.5s infinite; }
+</style>"""
+
+def diagram_number(num: int, highlighted: bool = False) -> str:
+    """Return the HTML of one number of the bone diagram."""
+    return f'<div class="osteo-num{" hl" if highlighted else ""}">{num}</div>'
+
+@st.cache_resource(max_entries=256)
+def bone_diagram_template(bone_group: str, catalog_mtime: int) -> str:
+    """Build the diagram of a bone group once, with no number highlighted."""
+    components = get_catalog().bones[bone_group]["components"]
+    numbers_html = "".join(diagram_number(num) for num in sorted(components))
+    return (
+        f'{DIAGRAM_CSS}<div class="osteo-diagram"><h3>{bone_group}</h3>'
+        f'<div class="osteo-grid">{numbers_html}</div></div>'
+    )
 
 def create_bone_diagram(bone_group: str, highlighted_number: int):
     """Create a visual representation of the bone with numbered components."""
-    components = ANATOMICAL_DATA[bone_group]["components"]
+    template = bone_diagram_template(bone_group, get_catalog().mtime)
+    return template.replace(diagram_number(highlighted_number), diagram_number(highlighted_number, True), 1)
+
+def handle_answer(bone_group: str, component_number: int, correct_answer: str, is_correct: bool, matched: int = None):
+    """Record a graded answer in the session and persistent stats and show the result.
+
+    ``matched`` is the structure a wrong answer designated instead, if known.
+    """
+    quiz = get_session()
+    quiz.record(is_correct)
+    stats_delta = {'total_questions': 1}
     
-    # Create a grid layout for the numbers
-    numbers_html = ""
-    for i, num in enumerate(sorted(components.keys())):
-        if num == highlighted_number:
-            # Highlighted number (current question)
-            numbers_html += f'''
-                <div style="background-color: #ff4444; color: white; border-radius: 50%; 
-                           width: 40px; height: 40px; display: inline-flex; align-items: center; 
-                           justify-content: center; font-weight: bold; font-size: 16px;
-                           margin: 3px; box-shadow: 0 4px 8px rgba(255,68,68,0.3);
-                           animation: pulse 1.5s infinite;">
-                    {num}
-                </div>
-            '''
-        else:
-            # Regular numbers
-            numbers_html += f'''
-                <div style="background-color: #e9ecef; color: #495057; border-radius: 50%; 
-                           width: 35px; height: 35px; display: inline-flex; align-items: center; 
-                           justify-content: center; font-weight: bold; margin: 3px;">
-                    {num}
-                </div>
-            '''
+    if is_correct:
+        stats_delta['total_score'] = 1
+        stats_delta['best_streak'] = quiz.streak
+        
+        st.success(f"🎉 Correct! La réponse était: **{correct_answer}**")
+        
+        # Special celebration message for 5 in a row
+        if quiz.streak == 5 and quiz.last_celebration_streak != quiz.streak:
+            quiz.last_celebration_streak = quiz.streak
+            stats_delta['last_celebration_streak'] = quiz.streak
+            show_celebration_message()
+        elif quiz.streak > 1:
+            st.balloons()
+            
+    else:
+        st.error(f"❌ Incorrect. La bonne réponse était: **{correct_answer}**")
+    
+    # Save persistent stats
+    save_persistent_stats(**stats_delta)
+    record_review(bone_group, component_number, QUALITY_CORRECT if is_correct else QUALITY_WRONG)
+    log_answer(bone_group, component_number, is_correct, matched=matched)
+    quiz.answer_submitted = True
+
+def handle_skip(bone_group: str, component_number: int, message: str):
+    """Record a skipped question in the session and persistent stats."""
+    quiz = get_session()
+    quiz.record(False)
+    st.warning(message)
+    save_persistent_stats(total_questions=1)
+    record_review(bone_group, component_number, QUALITY_SKIPPED)
+    log_answer(bone_group, component_number, False, skipped=True)
+    quiz.answer_submitted = True
+
+@metrics.timed("grade_exam")
+def grade_exam(quiz: QuizSession, answers: List[str]):
+    """Grade every answer of the exam at once and record the result in a single stats write."""
+    catalog = get_catalog()
+    questions = [catalog.question(structure_id) for structure_id in quiz.exam]
+    results = build_answer_matcher(catalog.mtime).check_many(answers, [question[2] for question in questions])
     
-    # Complete HTML structure
-    diagram_html = f'''
-    <style>
-        @keyframes pulse {{
-            0% {{ box-shadow: 0 4px 8px rgba(255,68,68,0.3); }}
-            50% {{ box-shadow: 0 8px 16px rgba(255,68,68,0.6); }}
-            100% {{ box-shadow: 0 4px 8px rgba(255,68,68,0.3); }}
-        }}
-    </style>
-    <div style="border: 2px solid #1f77b4; border-radius: 10px; padding: 20px; 
-                background-color: #f8f9fa; text-align: center;">
-        <h3 style="color: #1f77b4; margin-bottom: 20px;">{bone_group}</h3>
-        <div style="display: flex; flex-wrap: wrap; justify-content: center; gap: 5px; max-width: 600px; margin: 0 auto;">
-            {numbers_html}
-        </div>
-    </div>
-    '''
+    # The exam is answered as a whole: spread its duration over the questions
+    latency = (time.time() - quiz.question_started_at) / len(results)
+    best_streak = 0
+    reviews = []
+    for (bone_group, component_number, _, _), answer, correct in zip(questions, answers, results):
+        quiz.record(correct)
+        best_streak = max(best_streak, quiz.streak)
+        quality = QUALITY_CORRECT if correct else QUALITY_WRONG if answer.strip() else QUALITY_SKIPPED
+        reviews.append(((bone_group, component_number), quality))
+        log_answer(bone_group, component_number, correct, skipped=not answer.strip(),
+                   matched=None if correct or not answer.strip() else identify_answer(bone_group, answer),
+                   latency=latency)
     
-    return diagram_html
+    stats_delta = {'total_questions': len(results), 'total_score': sum(results)}
+    if best_streak:
+        stats_delta['best_streak'] = best_streak
+    save_persistent_stats(**stats_delta)
+    record_reviews(reviews)
+    quiz.exam_answers = tuple(answers)
+    quiz.exam_results = tuple(results)
 
+def display_exam(quiz: QuizSession):
+    """Show the exam mode: every question in one form, graded together on submission."""
+    catalog = get_catalog()
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        size = st.selectbox("Nombre de questions", EXAM_SIZES, key="exam_size")
+    with col2:
+        st.write("")
+        if st.button("📝 Nouvel examen", type="primary", use_container_width=True):
+            quiz.exam = generate_exam(quiz.selected_bones, size)
+            quiz.exam_answers = quiz.exam_results = None
+            quiz.question_started_at = time.time()
+            st.rerun()
+    
+    if quiz.exam is None:
+        st.info("👆 Cliquez sur 'Nouvel examen' pour générer une série de questions, corrigée en une fois.")
+        return
+    
+    if quiz.exam_results is not None:
+        # Results
+        score = sum(quiz.exam_results)
+        st.subheader(f"📋 Résultat: {score}/{len(quiz.exam_results)}")
+        for i, (structure_id, answer, correct) in enumerate(zip(quiz.exam, quiz.exam_answers, quiz.exam_results), 1):
+            bone_group, component_number, correct_answer, bone_title = catalog.question(structure_id)
+            if correct:
+                st.success(f"{i}. {bone_title} n° {component_number}: **{correct_answer}**")
+            else:
+                st.error(f"{i}. {bone_title} n° {component_number}: **{correct_answer}**"
+                         + (f" (votre réponse: *{answer}*)" if answer.strip() else " (sans réponse)"))
+        return
+    
+    with st.form("exam"):
+        answers = []
+        for i, structure_id in enumerate(quiz.exam, 1):
+            bone_group, component_number, _, bone_title = catalog.question(structure_id)
+            st.markdown(f"### Question {i}: {bone_title}, structure numéro {component_number}")
+            bone_data = catalog.bones[bone_group]
+            # Tabs switch views in the browser, without a rerun
+            for tab, image_file, view in zip(st.tabs(bone_data['views']), bone_data['image_files'], bone_data['views']):
+                with tab:
+                    show_image(image_file, f"{bone_title} - {view}")
+            answers.append(st.text_input("Votre réponse:", key=f"exam_answer_{hash(quiz.exam)}_{i}", placeholder="Tapez le nom de la structure..."))
+        if st.form_submit_button("✅ Terminer l'examen", type="primary", use_container_width=True):
+            grade_exam(quiz, answers)
+            st.rerun()
+
+@metrics.timed("rerun")
 def main():
     st.set_page_config(
         page_title="Ostéologie Équine - Quiz",
@@ -525,7 +592,11 @@ def main():
         layout="wide"
     )
     
-    initialize_session_state()
+    start_metrics()
+    quiz = initialize_session_state()
+    metrics.inc("osteo_reruns_total", "Script reruns")
+    metrics.touch_session(id(quiz))
+    catalog = get_catalog()
     
     # Header
     st.title("🐎 Quiz d'Ostéologie Équine")
@@ -537,31 +608,51 @@ def main():
         
         # Bone selection
         st.subheader("Sélectionner les groupes d'os")
-        available_bones = list(ANATOMICAL_DATA.keys())
+        asset_manifest = get_asset_manifest()
+        hide_incomplete = st.checkbox("Masquer les groupes aux images incomplètes", key="hide_incomplete")
+        available_bones = [
+            bone for bone in catalog.bones
+            if not (hide_incomplete and not asset_manifest.is_complete(bone))
+        ]
         
         # Select all/none buttons
         col1, col2 = st.columns(2)
         with col1:
             if st.button("Tout sélectionner"):
-                st.session_state.selected_bones = available_bones.copy()
+                quiz.selected_bones = available_bones.copy()
                 st.rerun()
         with col2:
             if st.button("Tout désélectionner"):
-                st.session_state.selected_bones = []
+                quiz.selected_bones = []
                 st.rerun()
         
         # Individual bone selection
         selected_bones_temp = []
         for bone in available_bones:
-            bone_count = len(ANATOMICAL_DATA[bone]["components"])
+            bone_count = catalog.counts[bone]
+            missing_images = asset_manifest.missing.get(bone)
             if st.checkbox(
-                f"{bone} ({bone_count} structures)", 
-                value=bone in st.session_state.selected_bones,
-                key=f"bone_{bone}"
+                f"{bone} ({bone_count} structures)" + (" ⚠️" if missing_images else ""), 
+                value=bone in quiz.selected_bones,
+                key=f"bone_{bone}",
+                help=f"Images manquantes: {', '.join(missing_images)}" if missing_images else None
             ):
                 selected_bones_temp.append(bone)
         
-        st.session_state.selected_bones = selected_bones_temp
+        quiz.selected_bones = selected_bones_temp
+        
+        # Question selection mode
+        question_modes = [RANDOM_MODE, SPACED_REPETITION_MODE, MULTIPLE_CHOICE_MODE, EXAM_MODE]
+        if catalog.located and streamlit_image_coordinates is not None:
+            question_modes.append(CLICK_MODE)
+        question_mode = st.radio(
+            "Mode de question", question_modes, key="question_mode",
+            help="La répétition espacée repose d'abord les structures que vous avez ratées ou qui sont à réviser."
+        )
+        if question_mode == CLICK_MODE and not any(pair[0] in quiz.selected_bones for pair in catalog.located):
+            st.caption("📍 Aucune structure localisée dans les groupes sélectionnés")
+        if question_mode == SPACED_REPETITION_MODE and quiz.selected_bones:
+            st.caption(f"🔁 {get_scheduler().due_count()} structure(s) à réviser")
         
         st.divider()
         
@@ -570,12 +661,12 @@ def main():
         
         # Session stats
         st.markdown("**Cette session:**")
-        if st.session_state.total_questions > 0:
-            session_accuracy = (st.session_state.score / st.session_state.total_questions) * 100
+        if quiz.total_questions > 0:
+            session_accuracy = (quiz.score / quiz.total_questions) * 100
             st.metric("Précision", f"{session_accuracy:.1f}%")
-            st.metric("Score", f"{st.session_state.score}/{st.session_state.total_questions}")
-            st.metric("Série actuelle", st.session_state.streak)
-            st.metric("Meilleure série (session)", st.session_state.best_streak)
+            st.metric("Score", f"{quiz.score}/{quiz.total_questions}")
+            st.metric("Série actuelle", quiz.streak)
+            st.metric("Meilleure série (session)", quiz.best_streak)
         else:
             st.info("Commencez le quiz pour voir vos statistiques de session!")
         
@@ -583,15 +674,24 @@ def main():
         
         # Persistent stats
         st.markdown("**Statistiques globales:**")
-        if st.session_state.persistent_total_questions > 0:
-            total_accuracy = (st.session_state.persistent_total_score / st.session_state.persistent_total_questions) * 100
+        persistent_stats = load_persistent_stats()
+        if persistent_stats['total_questions'] > 0:
+            total_accuracy = (persistent_stats['total_score'] / persistent_stats['total_questions']) * 100
             st.metric("Précision totale", f"{total_accuracy:.1f}%")
-            st.metric("Score total", f"{st.session_state.persistent_total_score}/{st.session_state.persistent_total_questions}")
-            st.metric("Meilleure série (toujours)", st.session_state.persistent_best_streak)
-            st.metric("Sessions jouées", st.session_state.persistent_sessions_played)
+            st.metric("Score total", f"{persistent_stats['total_score']}/{persistent_stats['total_questions']}")
+            st.metric("Meilleure série (toujours)", persistent_stats['best_streak'])
+            st.metric("Sessions jouées", persistent_stats['sessions_played'])
         else:
             st.info("Aucune statistique globale disponible encore!")
         
+        all_users = load_all_users_stats()
+        if all_users and all_users['total_questions'] > 0:
+            all_accuracy = (all_users['total_score'] / all_users['total_questions']) * 100
+            st.caption(
+                f"Tous les utilisateurs: {all_users['users']} joueurs, {all_users['total_questions']} réponses, "
+                f"{all_accuracy:.1f}% de précision, meilleure série {all_users['best_streak']}"
+            )
+        
         if st.button("🔄 Réinitialiser", type="secondary"):
             # Store confirmation state
             st.session_state.show_reset_confirmation = True
@@ -601,14 +701,14 @@ def main():
             st.warning("⚠️ **Confirmation requise**")
             
             # Show current stats that will be lost
-            if st.session_state.persistent_total_questions > 0:
-                total_accuracy = (st.session_state.persistent_total_score / st.session_state.persistent_total_questions) * 100
+            if persistent_stats['total_questions'] > 0:
+                total_accuracy = (persistent_stats['total_score'] / persistent_stats['total_questions']) * 100
                 st.markdown(f"""
                 **Toutes ces statistiques seront définitivement supprimées:**
-                - Score total: {st.session_state.persistent_total_score}/{st.session_state.persistent_total_questions}
+                - Score total: {persistent_stats['total_score']}/{persistent_stats['total_questions']}
                 - Précision globale: {total_accuracy:.1f}%
-                - Meilleure série: {st.session_state.persistent_best_streak}
-                - Sessions jouées: {st.session_state.persistent_sessions_played}
+                - Meilleure série: {persistent_stats['best_streak']}
+                - Sessions jouées: {persistent_stats['sessions_played']}
                 """)
             
             col1, col2 = st.columns(2)
@@ -634,25 +734,29 @@ def main():
         4. Tapez votre réponse et validez
         5. Continuez pour améliorer votre score!
         
-        **Astuce:** Les réponses partielles sont acceptées si elles contiennent les mots-clés principaux.
+        **Astuce:** Les réponses partielles sont acceptées si elles contiennent les mots-clés principaux, même avec une petite faute de frappe.
         """)
     
     # Main content area
-    if not st.session_state.selected_bones:
+    if not quiz.selected_bones:
         st.warning("⚠️ Veuillez sélectionner au moins un groupe d'os dans la barre latérale pour commencer.")
         return
     
+    if question_mode == EXAM_MODE:
+        display_exam(quiz)
+        return
+    
     # Question generation
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
         if st.button("🎲 Nouvelle Question", type="primary", use_container_width=True):
-            st.session_state.current_question = generate_question(st.session_state.selected_bones)
-            st.session_state.answer_submitted = False
+            quiz.question_id = next_question()
+            quiz.answer_submitted = False
             st.rerun()
     
     # Display current question
-    if st.session_state.current_question:
-        bone_group, component_number, correct_answer, bone_title = st.session_state.current_question
+    if quiz.question_id is not None:
+        bone_group, component_number, correct_answer, bone_title = catalog.question(quiz.question_id)
         
         st.markdown("---")
         
@@ -660,22 +764,58 @@ def main():
         
         with col1:
             st.subheader(f"📋 {bone_title}")
-            st.markdown(f"**Vues disponibles:** {', '.join(ANATOMICAL_DATA[bone_group]['views'])}")
+            st.markdown(f"**Vues disponibles:** {', '.join(catalog.bones[bone_group]['views'])}")
             
             # Display anatomical images
-            display_anatomical_image(bone_group)
+            click_question = (st.session_state.question_mode == CLICK_MODE
+                              and (bone_group, component_number) in catalog.located)
+            clicked = None
+            if click_question and not quiz.answer_submitted:
+                clicked = display_click_view(bone_group, component_number)
+            else:
+                display_anatomical_image(bone_group, highlighted_number=component_number)
         
         with col2:
             st.markdown("### ❓ Question")
-            st.info(f"**Quelle est la structure numéro {component_number} ?**")
+            if click_question:
+                st.info(f"**Cliquez sur la structure: {correct_answer}**")
+            else:
+                st.info(f"**Quelle est la structure numéro {component_number} ?**")
             
             # Answer input
-            if not st.session_state.answer_submitted:
+            if click_question and not quiz.answer_submitted:
+                if clicked is not None:
+                    handle_answer(bone_group, component_number, correct_answer, clicked == component_number, clicked)
+                    if clicked != component_number:
+                        st.info(f"Vous avez cliqué sur: *{catalog.answer(bone_group, clicked)}*")
+                elif st.button("⏭️ Passer", type="secondary", use_container_width=True):
+                    handle_skip(bone_group, component_number, "⏭️ Question passée. La structure est entourée sur l'image.")
+                    st.rerun()
+                else:
+                    st.caption("Cliquez sur l'image; un clic hors de toute structure n'est pas compté.")
+            
+            elif question_mode == MULTIPLE_CHOICE_MODE and not quiz.answer_submitted:
+                if quiz.choices is None:
+                    quiz.choices = build_distractor_index(catalog.mtime).choices(quiz.question_id)
+                chosen = None
+                choice_columns = st.columns(2)
+                for i, choice in enumerate(quiz.choices):
+                    with choice_columns[i % 2]:
+                        if st.button(catalog.question(choice)[2], key=f"choice_{i}", use_container_width=True):
+                            chosen = choice
+                if chosen is not None:
+                    is_correct = chosen == quiz.question_id
+                    handle_answer(bone_group, component_number, correct_answer, is_correct,
+                                  None if is_correct else catalog.pairs[chosen][1])
+                elif st.button("⏭️ Passer", type="secondary", use_container_width=True):
+                    handle_skip(bone_group, component_number, f"⏭️ Question passée. La réponse était: **{correct_answer}**")
+            
+            elif not quiz.answer_submitted:
                 user_answer = st.text_input(
                     "Votre réponse:", 
                     key="answer_input",
                     placeholder="Tapez le nom de la structure...",
-                    help="Les accents ne sont pas obligatoires. Les réponses partielles sont acceptées."
+                    help="Les accents ne sont pas obligatoires. Les réponses partielles et les petites fautes de frappe sont acceptées."
                 )
                 
                 col_submit, col_skip = st.columns(2)
@@ -685,46 +825,14 @@ def main():
                     skip_button = st.button("⏭️ Passer", type="secondary", use_container_width=True)
                 
                 if submit_button and user_answer:
-                    st.session_state.total_questions += 1
-                    st.session_state.persistent_total_questions += 1
                     is_correct = check_answer(user_answer, correct_answer)
-                    
-                    if is_correct:
-                        st.session_state.score += 1
-                        st.session_state.persistent_total_score += 1
-                        st.session_state.streak += 1
-                        
-                        # Update best streaks
-                        if st.session_state.streak > st.session_state.best_streak:
-                            st.session_state.best_streak = st.session_state.streak
-                        if st.session_state.streak > st.session_state.persistent_best_streak:
-                            st.session_state.persistent_best_streak = st.session_state.streak
-                        
-                        st.success(f"🎉 Correct! La réponse était: **{correct_answer}**")
-                        
-                        # Special celebration message for 5 in a row
-                        if st.session_state.streak == 5 and st.session_state.last_celebration_streak != st.session_state.streak:
-                            st.session_state.last_celebration_streak = st.session_state.streak
-                            show_celebration_message()
-                        elif st.session_state.streak > 1:
-                            st.balloons()
-                            
-                    else:
-                        st.session_state.streak = 0
-                        st.error(f"❌ Incorrect. La bonne réponse était: **{correct_answer}**")
+                    handle_answer(bone_group, component_number, correct_answer, is_correct,
+                                  None if is_correct else identify_answer(bone_group, user_answer))
+                    if not is_correct:
                         st.info(f"Votre réponse: *{user_answer}*")
                     
-                    # Save persistent stats
-                    save_persistent_stats()
-                    st.session_state.answer_submitted = True
-                    
                 elif skip_button:
-                    st.session_state.total_questions += 1
-                    st.session_state.persistent_total_questions += 1
-                    st.session_state.streak = 0
-                    st.warning(f"⏭️ Question passée. La réponse était: **{correct_answer}**")
-                    save_persistent_stats()
-                    st.session_state.answer_submitted = True
+                    handle_skip(bone_group, component_number, f"⏭️ Question passée. La réponse était: **{correct_answer}**")
                 
                 elif submit_button and not user_answer:
                     st.warning("Veuillez entrer une réponse avant de valider.")
@@ -733,18 +841,22 @@ def main():
                 # Show result and next question button
                 st.markdown("---")
                 if st.button("➡️ Question Suivante", type="primary", use_container_width=True):
-                    st.session_state.current_question = generate_question(st.session_state.selected_bones)
-                    st.session_state.answer_submitted = False
+                    quiz.question_id = next_question()
+                    quiz.answer_submitted = False
                     st.rerun()
+        
+        # The schedule only knows the next due structure once this one is answered
+        if question_mode != SPACED_REPETITION_MODE or quiz.answer_submitted:
+            prepare_next_question()
     
     else:
         st.info("👆 Cliquez sur 'Nouvelle Question' pour commencer le quiz!")
     
     # Additional information section
-    if st.session_state.current_question:
-        bone_group = st.session_state.current_question[0]
+    if quiz.question_id is not None:
+        bone_group, component_number = catalog.pairs[quiz.question_id]
         with st.expander("📚 Voir toutes les structures de ce groupe"):
-            components = ANATOMICAL_DATA[bone_group]["components"]
+            components = catalog.bones[bone_group]["components"]
             
             # Create two columns for better layout
             col1, col2 = st.columns(2)
@@ -753,14 +865,14 @@ def main():
             
             with col1:
                 for num, name in items[:mid_point]:
-                    if num == st.session_state.current_question[1]:
+                    if num == component_number:
                         st.markdown(f"**{num}. {name}** ← *Question actuelle*")
                     else:
                         st.write(f"{num}. {name}")
             
             with col2:
                 for num, name in items[mid_point:]:
-                    if num == st.session_state.current_question[1]:
+                    if num == component_number:
                         st.markdown(f"**{num}. {name}** ← *Question actuelle*")
                     else:
                         st.write(f"{num}. {name}")
@@ -0,0 +1,122 @@
+import os
+
+import streamlit as st
+import pandas as pd
+
+from analytics import (
+    HistoryVersion, accuracy_by_bone, accuracy_by_structure, concat_history, confusion_pairs, history_version,
+    learning_curve, read_segment,
+)
+from catalog import CATALOG_FILE, load_catalog
+from event_log import ACTIVE_SEGMENT, EVENT_LOG_DIR, get_event_log
+from stats_store import DEFAULT_USER
+
+MIN_STRUCTURE_ANSWERS = 3
+TOP_ROWS = 15
+
+
+@st.cache_resource(max_entries=512)
+def load_segment(path: str, size: int, mtime_ns: int) -> pd.DataFrame:
+    """Parse one rotated log segment; those never change, so each is parsed once."""
+    return read_segment(path)
+
+
+@st.cache_resource(max_entries=2)
+def load_history(version: HistoryVersion) -> pd.DataFrame:
+    """Return the whole answer history for a given log version."""
+    # The active segment changes with every answer: parse it again rather than cache every size of it
+    return concat_history(
+        read_segment(segment[0]) if os.path.basename(segment[0]) == ACTIVE_SEGMENT else load_segment(*segment)
+        for segment in version
+    )
+
+
+@st.cache_data(max_entries=16)
+def summarize(version: HistoryVersion, user_id: str = None) -> dict:
+    """Compute every table of the page once per log version and user filter."""
+    history = load_history(version)
+    if user_id is not None:
+        history = history[history["user"] == user_id]
+    return {
+        "answers": len(history),
+        "accuracy": float(history["correct"].mean()) if len(history) else 0.0,
+        "bones": accuracy_by_bone(history),
+        "structures": accuracy_by_structure(history, MIN_STRUCTURE_ANSWERS).head(TOP_ROWS),
+        "confusions": confusion_pairs(history).head(TOP_ROWS),
+        "curve": learning_curve(history),
+    }
+
+
+def structure_name(bone_group: str, number: int) -> str:
+    """Return the name of a structure, or its number if the catalog no longer has it."""
+    components = load_catalog(CATALOG_FILE).bones.get(bone_group, {}).get("components", {})
+    return components.get(int(number), f"n° {number}")
+
+
+def main():
+    st.set_page_config(page_title="Ostéologie Équine - Analyse", page_icon="📊", layout="wide")
+    st.title("📊 Analyse des réponses")
+
+    # Include the answers still buffered by the quiz (same process, same writer)
+    get_event_log().flush()
+    version = history_version(EVENT_LOG_DIR)
+    scope = st.radio("Réponses", ["Les miennes", "Tous les utilisateurs"], horizontal=True)
+    summary = summarize(version, st.query_params.get("user", DEFAULT_USER) if scope == "Les miennes" else None)
+
+    if not summary["answers"]:
+        st.info("Aucune réponse enregistrée pour l'instant. Répondez à quelques questions du quiz!")
+        return
+
+    col1, col2 = st.columns(2)
+    col1.metric("Réponses", f"{summary['answers']:,}".replace(",", " "))
+    col2.metric("Précision", f"{summary['accuracy'] * 100:.1f}%")
+
+    st.subheader("Précision par groupe d'os")
+    bones = summary["bones"]
+    st.dataframe(
+        pd.DataFrame({
+            "Réponses": bones["answers"],
+            "Précision": (bones["accuracy"] * 100).round(1),
+            "Passées (%)": (bones["skipped"] * 100).round(1),
+            "Temps médian (s)": bones["latency"].round(1),
+        }),
+        use_container_width=True,
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Structures les plus difficiles")
+        structures = summary["structures"]
+        if structures.empty:
+            st.caption(f"Au moins {MIN_STRUCTURE_ANSWERS} réponses par structure sont nécessaires.")
+        else:
+            st.dataframe(
+                pd.DataFrame({
+                    "Structure": [structure_name(bone, number) for bone, number in structures.index],
+                    "Groupe": [bone for bone, _ in structures.index],
+                    "Réponses": structures["answers"].to_numpy(),
+                    "Précision": (structures["accuracy"] * 100).round(1).to_numpy(),
+                }),
+                hide_index=True, use_container_width=True,
+            )
+    with col2:
+        st.subheader("Confusions fréquentes")
+        confusions = summary["confusions"]
+        if confusions.empty:
+            st.caption("Aucune confusion entre structures enregistrée.")
+        else:
+            st.dataframe(
+                pd.DataFrame({
+                    "Structure demandée": [structure_name(b, n) for b, n in zip(confusions["bone"], confusions["number"])],
+                    "Réponse donnée": [structure_name(b, m) for b, m in zip(confusions["bone"], confusions["matched"])],
+                    "Fois": confusions["count"],
+                }),
+                hide_index=True, use_container_width=True,
+            )
+
+    st.subheader("Courbe d'apprentissage")
+    curve = summary["curve"]
+    st.line_chart(curve.set_index("attempt")["accuracy"] * 100, x_label="Nombre de questions", y_label="Précision (%)")
+
+
+main()
@@ -0,0 +1,53 @@
+"""Compact per-session quiz state.
+
+Each browser session keeps one ``QuizSession`` in ``st.session_state``.
+It holds small integers only: the current and recent questions are
+structure IDs (positions in ``Catalog.pairs``), resolved against the
+catalog shared by the whole process when they are displayed. Persistent
+totals are read from the stats store instead of being copied per session.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from scheduler import Scheduler
+
+
+@dataclass(slots=True)
+class QuizSession:
+    selected_bones: List[str]
+    # Structure IDs recently asked, to avoid repeats
+    recent: deque
+    # Catalog version the structure IDs refer to
+    catalog_mtime: int = 0
+    question_id: Optional[int] = None
+    # Question picked in advance (its images are being warmed), valid for one mode and selection
+    next_question_id: Optional[int] = None
+    next_question_key: Tuple[str, ...] = field(default=())
+    answer_submitted: bool = False
+    # Wall-clock time the current question was shown, for answer latency
+    question_started_at: float = 0.0
+    score: int = 0
+    total_questions: int = 0
+    streak: int = 0
+    best_streak: int = 0
+    last_celebration_streak: int = 0
+    scheduler: Optional[Scheduler] = None
+    scheduler_selection: Tuple[str, ...] = field(default=())
+    # Multiple-choice mode: the structure IDs offered for the current question
+    choices: Optional[Tuple[int, ...]] = None
+    # Exam mode: the structure IDs of the exam, then the answers given and their grades
+    exam: Optional[Tuple[int, ...]] = None
+    exam_answers: Optional[Tuple[str, ...]] = None
+    exam_results: Optional[Tuple[bool, ...]] = None
+
+    def record(self, correct: bool) -> None:
+        """Count one answered question."""
+        self.total_questions += 1
+        if correct:
+            self.score += 1
+            self.streak += 1
+            self.best_streak = max(self.best_streak, self.streak)
+        else:
+            self.streak = 0
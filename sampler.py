@@ -0,0 +1,85 @@
+"""Constant-time weighted sampling of quiz questions (Vose's alias method)."""
+
+import random
+from collections import deque
+from typing import Dict, Generic, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+# Attempts at drawing an item outside the no-repeat window before giving up
+MAX_REDRAWS = 32
+
+
+class AliasSampler(Generic[T]):
+    """Draw items with fixed weights in O(1) after an O(n) setup."""
+
+    def __init__(self, items: Sequence[T], weights: Optional[Sequence[float]] = None, rng: Optional[random.Random] = None):
+        if not items:
+            raise ValueError("cannot sample from an empty sequence")
+        self.items = list(items)
+        self.rng = rng or random.Random()
+        n = len(self.items)
+        weights = [1.0] * n if weights is None else [float(w) for w in weights]
+        if len(weights) != n or any(w < 0 for w in weights) or sum(weights) <= 0:
+            raise ValueError("weights must be non-negative, not all zero, and one per item")
+
+        total = sum(weights)
+        scaled = [w * n / total for w in weights]
+        self._prob = [0.0] * n
+        self._alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self._prob[s] = scaled[s]
+            self._alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Leftovers are 1 up to rounding errors
+        for i in small + large:
+            self._prob[i] = 1.0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def sample(self) -> T:
+        """Draw one item."""
+        column = int(self.rng.random() * len(self.items))
+        if self.rng.random() < self._prob[column]:
+            return self.items[column]
+        return self.items[self._alias[column]]
+
+
+class QuestionSampler(Generic[T]):
+    """Draw structures (structure IDs or (bone group, number) pairs) of the selected groups.
+
+    Sampling is uniform over structures unless ``weights`` maps some of them to
+    a custom weight (missing ones weigh 1). A sampler holds no per-user state,
+    so one instance can be shared by every session with the same selection.
+    """
+
+    def __init__(self, pairs: Sequence[T], weights: Optional[Dict[T, float]] = None,
+                 rng: Optional[random.Random] = None):
+        weight_list = None if weights is None else [weights.get(pair, 1.0) for pair in pairs]
+        self._sampler = AliasSampler(pairs, weight_list, rng)
+
+    def __len__(self) -> int:
+        return len(self._sampler)
+
+    def sample(self, recent: Optional[deque] = None) -> T:
+        """Draw the next structure, avoiding the ``recent`` window when possible.
+
+        The drawn structure is appended to ``recent``; give it a ``maxlen`` to set
+        the size of the no-repeat window.
+        """
+        pair = self._sampler.sample()
+        if recent is not None:
+            # A window as large as the pool cannot be avoided
+            if len(recent) < len(self._sampler):
+                redraws = 0
+                while pair in recent and redraws < MAX_REDRAWS:
+                    pair = self._sampler.sample()
+                    redraws += 1
+            recent.append(pair)
+        return pair
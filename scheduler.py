@@ -0,0 +1,101 @@
+"""SM-2 spaced-repetition scheduling of quiz structures.
+
+Each structure the learner has seen gets a compact memory state (ease,
+interval, repetitions, due time). Due structures are kept in a heap, so the
+next one is found in O(log n) no matter how large the catalog grows.
+"""
+
+import heapq
+import time
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+DAY = 86400.0
+# A failed structure comes back after this delay, within the same session
+RELEARN_DELAY = 10 * 60.0
+MIN_EASE = 1.3
+INITIAL_EASE = 2.5
+
+# Answer qualities on the SM-2 0-5 scale
+QUALITY_CORRECT = 4
+QUALITY_WRONG = 1
+QUALITY_SKIPPED = 0
+
+
+class CardState(NamedTuple):
+    ease: float
+    interval: float  # days
+    reps: int
+    due: float  # epoch seconds
+
+
+def review(state: Optional[CardState], quality: int, now: Optional[float] = None) -> CardState:
+    """Return the state of a structure after an answer of the given quality (0-5)."""
+    now = time.time() if now is None else now
+    ease, interval, reps = (INITIAL_EASE, 0.0, 0) if state is None else state[:3]
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    if quality < 3:
+        return CardState(ease, 0.0, 0, now + RELEARN_DELAY)
+    if reps == 0:
+        interval = 1.0
+    elif reps == 1:
+        interval = 6.0
+    else:
+        interval = interval * ease
+    return CardState(ease, interval, reps + 1, now + interval * DAY)
+
+
+class Scheduler:
+    """Priority queue of structures ordered by due time.
+
+    Updated states are pushed again instead of being moved in the heap; stale
+    heap entries are skipped when they reach the top.
+    """
+
+    def __init__(self, states: Optional[Dict[Hashable, CardState]] = None, keys: Optional[Iterable[Hashable]] = None):
+        """Schedule ``states``, restricted to ``keys`` when given."""
+        states = states or {}
+        if keys is not None:
+            keys = set(keys)
+            states = {key: state for key, state in states.items() if key in keys}
+        self.states: Dict[Hashable, CardState] = dict(states)
+        self._heap: List[Tuple[float, Hashable]] = [(state.due, key) for key, state in self.states.items()]
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.states
+
+    def _top(self) -> Optional[Tuple[float, Hashable]]:
+        while self._heap:
+            due, key = self._heap[0]
+            state = self.states.get(key)
+            if state is not None and state.due == due:
+                return due, key
+            heapq.heappop(self._heap)
+        return None
+
+    def next_due(self, now: Optional[float] = None) -> Optional[Hashable]:
+        """Return the most overdue structure, or None if nothing is due yet."""
+        now = time.time() if now is None else now
+        top = self._top()
+        if top is None or top[0] > now:
+            return None
+        return top[1]
+
+    def due_count(self, now: Optional[float] = None) -> int:
+        """Return how many structures are due (O(n), meant for display)."""
+        now = time.time() if now is None else now
+        return sum(1 for state in self.states.values() if state.due <= now)
+
+    def record(self, key: Hashable, quality: int, now: Optional[float] = None) -> CardState:
+        """Update a structure after an answer and reschedule it."""
+        state = review(self.states.get(key), quality, now)
+        self.states[key] = state
+        heapq.heappush(self._heap, (state.due, key))
+        # Keep stale entries from piling up in long sessions
+        if len(self._heap) > 2 * len(self.states) + 64:
+            self._heap = [(s.due, k) for k, s in self.states.items()]
+            heapq.heapify(self._heap)
+        return state
@@ -0,0 +1,540 @@
+"""Persistent statistics storage for the osteology quiz.
+
+Statistics are keyed per user and updated with *deltas* rather than by
+rewriting a snapshot, so concurrent sessions never overwrite each other:
+
+- counter fields are added to the stored value,
+- max fields keep the largest value seen,
+- assign fields are overwritten with the new value.
+
+Several server processes can share one SQLite file: each one merges its
+deltas in memory and applies them to the file in atomic transactions, so
+the stored totals are the sum of every process's updates.
+
+Stores also keep the spaced-repetition state of each structure a user has
+seen ("cards"), keyed by (bone group, number) and stored as plain
+(ease, interval, reps, due) tuples; the last write of a card wins.
+"""
+
+import atexit
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+DEFAULT_USER = "default"
+
+# Stat fields and how a delta for each of them is applied
+COUNTER_FIELDS = ("total_score", "total_questions", "sessions_played")
+MAX_FIELDS = ("best_streak",)
+ASSIGN_FIELDS = ("last_celebration_streak",)
+STAT_FIELDS = COUNTER_FIELDS + MAX_FIELDS + ASSIGN_FIELDS
+# Fields that add up over all users (with the number of users in "users")
+TOTAL_FIELDS = COUNTER_FIELDS + MAX_FIELDS
+
+# Seconds between checks of whether another process changed the stored stats
+VERSION_CHECK_INTERVAL = 1.0
+
+CardKey = Tuple[str, int]
+Card = Tuple[float, float, int, float]
+
+
+def empty_stats() -> Dict[str, int]:
+    """Return a fresh statistics dict with every field at zero."""
+    return {field: 0 for field in STAT_FIELDS}
+
+
+def apply_delta(stats: Dict[str, int], delta: Dict[str, int]) -> Dict[str, int]:
+    """Apply a delta to a statistics dict in place and return it."""
+    for field, value in delta.items():
+        if field in COUNTER_FIELDS:
+            stats[field] = stats.get(field, 0) + value
+        elif field in MAX_FIELDS:
+            stats[field] = max(stats.get(field, 0), value)
+        elif field in ASSIGN_FIELDS:
+            stats[field] = value
+        else:
+            raise KeyError(f"Unknown stat field: {field}")
+    return stats
+
+
+def empty_totals() -> Dict[str, int]:
+    """Return all-user totals with every field at zero."""
+    return {field: 0 for field in TOTAL_FIELDS + ("users",)}
+
+
+def merge_deltas(first: Dict[str, int], second: Dict[str, int]) -> Dict[str, int]:
+    """Combine two deltas into one that has the same effect as applying both."""
+    merged = dict(first)
+    apply_delta(merged, second)
+    return merged
+
+
+class StatsStore:
+    """Interface of a per-user statistics backend."""
+
+    def load(self, user_id: str) -> Dict[str, int]:
+        """Return the statistics of a user (zeros if unknown)."""
+        raise NotImplementedError
+
+    def update(self, user_id: str, delta: Dict[str, int]) -> None:
+        """Atomically apply a delta to the statistics of a user."""
+        raise NotImplementedError
+
+    def reset(self, user_id: str) -> None:
+        """Delete every statistic and card of a user."""
+        raise NotImplementedError
+
+    def totals(self) -> Dict[str, int]:
+        """Return the counters summed over all users, the best streak of any user and the number of users."""
+        raise NotImplementedError
+
+    def user_ids(self) -> Set[str]:
+        """Return the users that have statistics."""
+        raise NotImplementedError
+
+    def data_version(self) -> Optional[int]:
+        """Return a number that changes when another process modifies the stats (None if it cannot)."""
+        return None
+
+    def load_cards(self, user_id: str) -> Dict[CardKey, Card]:
+        """Return the spaced-repetition cards of a user."""
+        raise NotImplementedError
+
+    def save_cards(self, user_id: str, cards: Dict[CardKey, Card]) -> None:
+        """Insert or replace cards of a user."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release any resource held by the backend."""
+
+
+class MemoryStatsStore(StatsStore):
+    """In-memory backend, mostly useful for tests and benchmarks."""
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._cards: Dict[str, Dict[CardKey, Card]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, user_id: str) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats.get(user_id) or empty_stats())
+
+    def update(self, user_id: str, delta: Dict[str, int]) -> None:
+        with self._lock:
+            apply_delta(self._stats.setdefault(user_id, empty_stats()), delta)
+
+    def reset(self, user_id: str) -> None:
+        with self._lock:
+            self._stats.pop(user_id, None)
+            self._cards.pop(user_id, None)
+
+    def totals(self) -> Dict[str, int]:
+        with self._lock:
+            totals = empty_totals()
+            for stats in self._stats.values():
+                apply_delta(totals, {field: stats[field] for field in TOTAL_FIELDS})
+            totals["users"] = len(self._stats)
+            return totals
+
+    def user_ids(self) -> Set[str]:
+        with self._lock:
+            return set(self._stats)
+
+    def load_cards(self, user_id: str) -> Dict[CardKey, Card]:
+        with self._lock:
+            return dict(self._cards.get(user_id, {}))
+
+    def save_cards(self, user_id: str, cards: Dict[CardKey, Card]) -> None:
+        with self._lock:
+            self._cards.setdefault(user_id, {}).update(cards)
+
+
+class SQLiteStatsStore(StatsStore):
+    """SQLite backend in WAL mode, safe for many threads and processes."""
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        # Every write of this process goes through one connection: PRAGMA data_version on it
+        # ignores its own commits, so it only changes when another process writes
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.Lock()
+        self._last_version: Optional[int] = None
+        columns = ", ".join(f"{field} INTEGER NOT NULL DEFAULT 0" for field in STAT_FIELDS)
+        with self._writer() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS stats (user_id TEXT PRIMARY KEY, {columns})")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cards (user_id TEXT NOT NULL, bone TEXT NOT NULL, number INTEGER NOT NULL, "
+                "ease REAL NOT NULL, interval REAL NOT NULL, reps INTEGER NOT NULL, due REAL NOT NULL, "
+                "PRIMARY KEY (user_id, bone, number)) WITHOUT ROWID"
+            )
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                               check_same_thread=check_same_thread)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        # One reading connection per thread: Streamlit runs each session on its own thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    @contextmanager
+    def _writer(self) -> Iterator[sqlite3.Connection]:
+        # Writes already take the database lock one at a time, so one connection loses nothing
+        with self._writer_lock:
+            if self._writer_conn is None:
+                self._writer_conn = self._connect(check_same_thread=False)
+            yield self._writer_conn
+
+    def load(self, user_id: str) -> Dict[str, int]:
+        row = self._connection().execute(
+            f"SELECT {', '.join(STAT_FIELDS)} FROM stats WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is None:
+            return empty_stats()
+        return dict(zip(STAT_FIELDS, row))
+
+    def update(self, user_id: str, delta: Dict[str, int]) -> None:
+        if not delta:
+            return
+        assignments = []
+        params = []
+        for field, value in delta.items():
+            if field in COUNTER_FIELDS:
+                assignments.append(f"{field} = {field} + ?")
+            elif field in MAX_FIELDS:
+                assignments.append(f"{field} = MAX({field}, ?)")
+            elif field in ASSIGN_FIELDS:
+                assignments.append(f"{field} = ?")
+            else:
+                raise KeyError(f"Unknown stat field: {field}")
+            params.append(value)
+        with self._writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("INSERT OR IGNORE INTO stats (user_id) VALUES (?)", (user_id,))
+                conn.execute(f"UPDATE stats SET {', '.join(assignments)} WHERE user_id = ?", (*params, user_id))
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def reset(self, user_id: str) -> None:
+        with self._writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM stats WHERE user_id = ?", (user_id,))
+                conn.execute("DELETE FROM cards WHERE user_id = ?", (user_id,))
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def totals(self) -> Dict[str, int]:
+        sums = ", ".join(f"COALESCE(SUM({field}), 0)" for field in COUNTER_FIELDS)
+        maxima = ", ".join(f"COALESCE(MAX({field}), 0)" for field in MAX_FIELDS)
+        row = self._connection().execute(f"SELECT {sums}, {maxima}, COUNT(*) FROM stats").fetchone()
+        return dict(zip(TOTAL_FIELDS + ("users",), row))
+
+    def user_ids(self) -> Set[str]:
+        return {user_id for user_id, in self._connection().execute("SELECT user_id FROM stats")}
+
+    def data_version(self) -> Optional[int]:
+        # Never wait for a write in progress (it may be waiting for another process): report the last value
+        if not self._writer_lock.acquire(blocking=False):
+            return self._last_version
+        try:
+            if self._writer_conn is None:
+                self._writer_conn = self._connect(check_same_thread=False)
+            self._last_version = self._writer_conn.execute("PRAGMA data_version").fetchone()[0]
+            return self._last_version
+        finally:
+            self._writer_lock.release()
+
+    def load_cards(self, user_id: str) -> Dict[CardKey, Card]:
+        rows = self._connection().execute(
+            "SELECT bone, number, ease, interval, reps, due FROM cards WHERE user_id = ?", (user_id,)
+        )
+        return {(bone, number): (ease, interval, reps, due) for bone, number, ease, interval, reps, due in rows}
+
+    def save_cards(self, user_id: str, cards: Dict[CardKey, Card]) -> None:
+        if not cards:
+            return
+        with self._writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cards (user_id, bone, number, ease, interval, reps, due) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(user_id, bone, number, *card) for (bone, number), card in cards.items()],
+                )
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+        with self._writer_lock:
+            if self._writer_conn is not None:
+                self._writer_conn.close()
+                self._writer_conn = None
+
+
+class WriteBehindStatsStore(StatsStore):
+    """Coalesce stat deltas in memory and flush them to a backend in the background.
+
+    Pending deltas are flushed when ``max_pending`` updates are buffered, every
+    ``flush_interval`` seconds, and when the process exits.
+
+    Recording an update takes no lock: it is appended to a queue (deque
+    appends are atomic) that readers and the flusher drain into the merged
+    pending deltas.
+
+    The stored stats of a user, and the all-user totals, are read from the
+    backend once, then kept in memory and advanced by every flushed delta,
+    so loading them again does no I/O. At most every
+    ``VERSION_CHECK_INTERVAL`` seconds the backend's data version is
+    compared, and the copies are dropped if another process wrote to it
+    (this process's own flushes leave the version unchanged).
+    """
+
+    def __init__(self, backend: StatsStore, max_pending: int = 50, flush_interval: float = 5.0):
+        self.backend = backend
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        # (user_id, delta, cards) updates not merged yet
+        self._queue: deque = deque()
+        self._pending: Dict[str, Dict[str, int]] = {}
+        self._pending_cards: Dict[str, Dict[CardKey, Card]] = {}
+        self._pending_count = 0
+        # Updates merged per user, so dropping a user's deltas also uncounts them
+        self._pending_updates: Dict[str, int] = {}
+        # Backend stats of the users loaded so far, including the batch being flushed
+        self._cache: Dict[str, Dict[str, int]] = {}
+        self._totals: Optional[Dict[str, int]] = None
+        # Users stored in the backend, loaded with the totals to count the new ones
+        self._user_ids: Set[str] = set()
+        self._version: Optional[int] = None
+        self._version_checked_at = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Guards the merged pending deltas and the cached stats; held only for in-memory work
+        self._lock = threading.Lock()
+        # Held while a batch is written, so readers never see it twice or not at all
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="stats-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _drain(self) -> None:
+        """Merge the queued updates into the pending deltas; the caller holds ``_lock``."""
+        queue = self._queue
+        while queue:
+            user_id, delta, cards = queue.popleft()
+            if delta is not None:
+                apply_delta(self._pending.setdefault(user_id, {}), delta)
+            else:
+                self._pending_cards.setdefault(user_id, {}).update(cards)
+            self._count_pending(user_id)
+        if self._pending_count >= self.max_pending:
+            self._wake.set()
+
+    def _count_pending(self, user_id: str) -> None:
+        self._pending_count += 1
+        self._pending_updates[user_id] = self._pending_updates.get(user_id, 0) + 1
+
+    def _check_version(self) -> None:
+        """Drop the cached stats if the backend changed; the caller holds ``_lock``."""
+        now = time.monotonic()
+        if now - self._version_checked_at < VERSION_CHECK_INTERVAL:
+            return
+        self._version_checked_at = now
+        version = self.backend.data_version()
+        if version != self._version:
+            self._cache.clear()
+            self._totals = None
+            self._version = version
+
+    def load(self, user_id: str) -> Dict[str, int]:
+        with self._lock:
+            self._drain()
+            self._check_version()
+            cached = self._cache.get(user_id)
+            if cached is not None:
+                self.cache_hits += 1
+                return apply_delta(dict(cached), self._pending.get(user_id) or {})
+            self.cache_misses += 1
+        with self._flush_lock:
+            stats = self.backend.load(user_id)
+            with self._lock:
+                self._drain()
+                self._cache[user_id] = dict(stats)
+                pending = dict(self._pending.get(user_id) or {})
+        return apply_delta(stats, pending)
+
+    def totals(self) -> Dict[str, int]:
+        with self._lock:
+            self._drain()
+            self._check_version()
+            if self._totals is not None:
+                return self._with_pending(self._totals)
+        with self._flush_lock:
+            totals = self.backend.totals()
+            user_ids = self.backend.user_ids()
+            with self._lock:
+                self._drain()
+                self._totals = dict(totals, users=len(user_ids))
+                self._user_ids = user_ids
+                return self._with_pending(self._totals)
+
+    def _with_pending(self, totals: Dict[str, int]) -> Dict[str, int]:
+        totals = self._with_pending_batch(totals, self._pending)
+        # Every pending stats delta creates its user's row when flushed
+        totals["users"] += sum(1 for user_id in self._pending if user_id not in self._user_ids)
+        return totals
+
+    def update(self, user_id: str, delta: Dict[str, int]) -> None:
+        if not delta:
+            return
+        self._queue.append((user_id, delta, None))
+        if len(self._queue) >= self.max_pending:
+            self._wake.set()
+
+    def reset(self, user_id: str) -> None:
+        with self._flush_lock:
+            with self._lock:
+                self._drain()
+                self._pending.pop(user_id, None)
+                self._pending_cards.pop(user_id, None)
+                self._pending_count -= self._pending_updates.pop(user_id, 0)
+                self._cache.pop(user_id, None)
+                self._totals = None
+            self.backend.reset(user_id)
+
+    def load_cards(self, user_id: str) -> Dict[CardKey, Card]:
+        with self._flush_lock:
+            cards = self.backend.load_cards(user_id)
+            with self._lock:
+                self._drain()
+                cards.update(self._pending_cards.get(user_id, {}))
+        return cards
+
+    def save_cards(self, user_id: str, cards: Dict[CardKey, Card]) -> None:
+        if not cards:
+            return
+        self._queue.append((user_id, None, dict(cards)))
+        if len(self._queue) >= self.max_pending:
+            self._wake.set()
+
+    def data_version(self) -> Optional[int]:
+        return self.backend.data_version()
+
+    def flush(self) -> None:
+        """Write every pending delta to the backend."""
+        with self._flush_lock:
+            with self._lock:
+                self._drain()
+                batch = self._pending
+                card_batch = self._pending_cards
+                self._pending = {}
+                self._pending_cards = {}
+                self._pending_count = 0
+                self._pending_updates = {}
+                # Readers no longer see the batch as pending: count it as stored already
+                for user_id, delta in batch.items():
+                    if user_id in self._cache:
+                        apply_delta(self._cache[user_id], delta)
+                if self._totals is not None:
+                    self._totals = self._with_pending_batch(self._totals, batch)
+                    new_users = batch.keys() - self._user_ids
+                    self._totals["users"] += len(new_users)
+                    self._user_ids |= new_users
+            for user_id, delta in batch.items():
+                try:
+                    self.backend.update(user_id, delta)
+                except sqlite3.Error:
+                    # Put the delta back in front of newer updates and retry on the next flush
+                    with self._lock:
+                        self._pending[user_id] = merge_deltas(delta, self._pending.get(user_id, {}))
+                        self._count_pending(user_id)
+                        # The cached stats counted it as stored: read them again
+                        self._cache.pop(user_id, None)
+                        self._totals = None
+            for user_id, cards in card_batch.items():
+                try:
+                    self.backend.save_cards(user_id, cards)
+                except sqlite3.Error:
+                    with self._lock:
+                        self._pending_cards[user_id] = {**cards, **self._pending_cards.get(user_id, {})}
+                        self._count_pending(user_id)
+
+    @staticmethod
+    def _with_pending_batch(totals: Dict[str, int], batch: Dict[str, Dict[str, int]]) -> Dict[str, int]:
+        totals = dict(totals)
+        for delta in batch.values():
+            apply_delta(totals, {field: value for field, value in delta.items() if field in TOTAL_FIELDS})
+        return totals
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        self.backend.close()
+        atexit.unregister(self.close)
+
+
+def create_stats_store(backend: str = "sqlite", path: Optional[str] = None) -> StatsStore:
+    """Create a statistics backend by name ('sqlite' or 'memory')."""
+    if backend == "sqlite":
+        return SQLiteStatsStore(path or "osteology_stats.db")
+    if backend == "memory":
+        return MemoryStatsStore()
+    raise ValueError(f"Unknown stats backend: {backend}")
+
+
+def migrate_pickle_stats(pickle_path: str, store: StatsStore, user_id: str = DEFAULT_USER) -> bool:
+    """Import a legacy pickle stats file into the store, then rename it.
+
+    Returns True if stats were migrated. The pickle is renamed with a
+    '.migrated' suffix before being read so the migration runs only once.
+    """
+    migrated_path = pickle_path + ".migrated"
+    # Rename first: only one process can win the rename, so stats are imported once
+    try:
+        os.rename(pickle_path, migrated_path)
+    except OSError:
+        return False
+    try:
+        with open(migrated_path, "rb") as f:
+            legacy = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return False
+    delta = {field: int(legacy.get(field, 0)) for field in STAT_FIELDS}
+    store.update(user_id, delta)
+    return True
@@ -0,0 +1,65 @@
+import json
+import os
+
+import pytest
+
+import catalog
+from catalog import CatalogError, load_catalog
+
+RAW = {
+    "version": 1,
+    "bones": {"Scapula": {"title": "Scapula", "views": ["Latérale"], "image_files": ["scapula.png"],
+                          "components": {"1": "Epine scapulaire", "2": "Col"}}},
+}
+
+
+@pytest.fixture
+def catalog_file(tmp_path, monkeypatch):
+    # Check the file's mtime on every call
+    monkeypatch.setattr(catalog, "CATALOG_RECHECK_SECONDS", 0)
+    monkeypatch.setattr(catalog, "_catalog_cache", {})
+    path = tmp_path / "anatomical_data.json"
+    path.write_text(json.dumps(RAW), encoding="utf-8")
+    return path
+
+
+def rewrite(path, text):
+    stat = os.stat(path)
+    path.write_text(text, encoding="utf-8")
+    # Make sure the change is seen even within the filesystem's mtime resolution
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_invalid_first_load_raises(catalog_file):
+    catalog_file.write_text('{"version": 1, "bones": {', encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_catalog(str(catalog_file))
+
+
+def test_missing_first_load_raises(tmp_path):
+    with pytest.raises(OSError):
+        load_catalog(str(tmp_path / "missing.json"))
+
+
+@pytest.mark.parametrize("broken", ['{"version": 1, "bones": {', json.dumps({"version": 2, "bones": {}})])
+def test_broken_reload_keeps_the_last_valid_catalog(catalog_file, broken):
+    loaded = load_catalog(str(catalog_file))
+    rewrite(catalog_file, broken)
+    assert load_catalog(str(catalog_file)) is loaded
+
+    fixed = dict(RAW, bones={"Scapula": dict(RAW["bones"]["Scapula"], components={"1": "Cartilage"})})
+    rewrite(catalog_file, json.dumps(fixed))
+    reloaded = load_catalog(str(catalog_file))
+    assert reloaded is not loaded
+    assert reloaded.answer("Scapula", 1) == "Cartilage"
+
+
+def test_deleted_file_keeps_the_last_valid_catalog(catalog_file):
+    loaded = load_catalog(str(catalog_file))
+    catalog_file.unlink()
+    assert load_catalog(str(catalog_file)) is loaded
+
+
+def test_schema_errors_are_catalog_errors():
+    with pytest.raises(CatalogError):
+        catalog.validate_catalog({"version": 1, "bones": {}})
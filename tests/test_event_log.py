@@ -0,0 +1,39 @@
+import os
+
+from event_log import AnswerEvent, EventLog, read_events
+
+EVENT = AnswerEvent(1.0, "alice", "Scapula", 1, True, False, 2.5)
+
+
+def test_failed_rotation_keeps_the_batch(tmp_path, monkeypatch):
+    log = EventLog(str(tmp_path), max_bytes=10, flush_interval=3600)
+    log.append(EVENT)
+    log.flush()
+
+    def deny(*args):
+        raise PermissionError("denied")
+
+    monkeypatch.setattr(os, "rename", deny)
+    log.append(EVENT)
+    log.flush()
+    assert log._pending == [EVENT]
+
+    monkeypatch.undo()
+    log.flush()
+    log.close()
+    assert list(read_events(str(tmp_path))) == [EVENT, EVENT]
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_writer_thread_survives_a_failing_flush(tmp_path, monkeypatch):
+    log = EventLog(str(tmp_path), flush_interval=0.01)
+    monkeypatch.setattr(log, "_rotate_if_full", lambda path: 1 / 0)
+    log.append(EVENT)
+    log._wake.set()
+    log._thread.join(0.2)
+    assert log._thread.is_alive()
+    monkeypatch.undo()
+    later = EVENT._replace(ts=2.0)
+    log.append(later)
+    log.close()
+    assert later in list(read_events(str(tmp_path)))
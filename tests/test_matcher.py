@@ -0,0 +1,97 @@
+import doctest
+
+import pytest
+
+import matcher
+from matcher import AnswerMatcher, bounded_edit_distance, fold, typo_budget
+
+ANSWERS = [
+    "Tubérosité de l'épine scapulaire", "Epine scapulaire", "Bord caudal ou axillaire", "Col",
+    "Fosse supra-épineuse", "Fosse infra-épineuse", "Cavité glénoïdale (glène) latérale",
+]
+
+
+@pytest.fixture(scope="module")
+def answer_matcher():
+    return AnswerMatcher(ANSWERS)
+
+
+def test_docstring_examples():
+    assert doctest.testmod(matcher).failed == 0
+
+
+def test_fold_strips_accents_and_case():
+    assert fold("Tubérosité ÉPINE glénoïdale") == "tuberosite epine glenoidale"
+
+
+@pytest.mark.parametrize("user_answer, correct_answer", [
+    ("tuberosite de l'epine scapulaire", "Tubérosité de l'épine scapulaire"),
+    ("TUBÉROSITÉ DE L'ÉPINE SCAPULAIRE", "Tubérosité de l'épine scapulaire"),
+    ("cavite glenoidale laterale", "Cavité glénoïdale (glène) latérale"),
+    ("Cavité Glénoïdale Latérale", "Cavité glénoïdale (glène) latérale"),
+])
+def test_accents_and_case_are_ignored(answer_matcher, user_answer, correct_answer):
+    assert answer_matcher.check(user_answer, correct_answer)
+
+
+@pytest.mark.parametrize("user_answer, correct_answer", [
+    # One edit in an 8-letter word, two in a longer one
+    ("tuberosite de l epinne scapulaire", "Tubérosité de l'épine scapulaire"),
+    ("tuberosite de l'epine scapulare", "Tubérosité de l'épine scapulaire"),
+    ("fosse supra-epinuese", "Fosse supra-épineuse"),
+    ("epine scapulare", "Epine scapulaire"),
+])
+def test_typos_within_the_bound_are_accepted(answer_matcher, user_answer, correct_answer):
+    assert answer_matcher.check(user_answer, correct_answer)
+
+
+@pytest.mark.parametrize("user_answer, correct_answer", [
+    # Short words allow no typo at all
+    ("cil", "Col"),
+    # Three edits in a long word exceed its budget of two
+    ("epine scapxxxre", "Epine scapulaire"),
+])
+def test_typos_beyond_the_bound_are_rejected(answer_matcher, user_answer, correct_answer):
+    assert not answer_matcher.check(user_answer, correct_answer)
+
+
+@pytest.mark.parametrize("user_answer, correct_answer", [
+    ("fosse infra epineuse", "Fosse supra-épineuse"),
+    ("fosse supra epineuse", "Fosse infra-épineuse"),
+    ("epine scapulaire", "Tubérosité de l'épine scapulaire"),
+    ("bord cranial", "Bord caudal ou axillaire"),
+    ("cavite glenoidale mediale", "Cavité glénoïdale (glène) latérale"),
+])
+def test_other_structures_are_rejected(answer_matcher, user_answer, correct_answer):
+    assert not answer_matcher.check(user_answer, correct_answer)
+
+
+@pytest.mark.parametrize("user_answer, correct_answer", [
+    ("", "Col"),
+    ("   ", "Fosse supra-épineuse"),
+    ("de", "Tubérosité de l'épine scapulaire"),
+    ("tuberosite", "Tubérosité de l'épine scapulaire"),
+    ("fosse", "Fosse supra-épineuse"),
+])
+def test_too_short_answers_are_rejected(answer_matcher, user_answer, correct_answer):
+    assert not answer_matcher.check(user_answer, correct_answer)
+
+
+def test_unknown_answers_are_compiled_on_demand():
+    assert AnswerMatcher().check("sillon brachial", "Face latérale : sillon brachial")
+
+
+def test_check_many_grades_each_pair(answer_matcher):
+    assert answer_matcher.check_many(
+        ["col", "fosse infra epineuse", "bord axillaire"],
+        ["Col", "Fosse supra-épineuse", "Bord caudal ou axillaire"],
+    ) == [True, False, True]
+
+
+def test_typo_budget_grows_with_word_length():
+    assert [typo_budget(n) for n in (3, 4, 5, 8, 9, 15)] == [0, 0, 1, 1, 2, 2]
+
+
+def test_bounded_edit_distance_stops_past_the_bound():
+    assert bounded_edit_distance("epine", "epinne", 1) == 1
+    assert bounded_edit_distance("scapulaire", "scapxxxre", 2) > 2
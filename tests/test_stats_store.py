@@ -0,0 +1,141 @@
+import sqlite3
+import threading
+
+import pytest
+
+from stats_store import MemoryStatsStore, SQLiteStatsStore, WriteBehindStatsStore, empty_stats, merge_deltas
+
+
+class FlakyStatsStore(MemoryStatsStore):
+    """Memory backend whose next ``failures`` writes raise like a locked database."""
+
+    def __init__(self, failures: int = 0):
+        super().__init__()
+        self.failures = failures
+        self.updates = 0
+
+    def update(self, user_id, delta):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        self.updates += 1
+        super().update(user_id, delta)
+
+
+@pytest.fixture
+def backend():
+    return FlakyStatsStore()
+
+
+@pytest.fixture
+def store(backend):
+    # No size or interval flush: the tests decide when to flush
+    store = WriteBehindStatsStore(backend, max_pending=10**6, flush_interval=3600)
+    yield store
+    store.close()
+
+
+def test_merge_deltas_adds_counters_maxes_and_assigns():
+    assert merge_deltas(
+        {"total_score": 1, "best_streak": 4, "last_celebration_streak": 5},
+        {"total_score": 2, "best_streak": 3, "last_celebration_streak": 10},
+    ) == {"total_score": 3, "best_streak": 4, "last_celebration_streak": 10}
+
+
+def test_updates_are_merged_into_one_backend_write(store, backend):
+    for correct in (1, 0, 1):
+        store.update("alice", {"total_score": correct, "total_questions": 1, "best_streak": correct})
+    store.update("alice", {"last_celebration_streak": 10})
+    assert backend.load("alice") == empty_stats()
+    assert store.load("alice")["total_questions"] == 3
+
+    store.flush()
+    assert backend.updates == 1
+    assert backend.load("alice") == {
+        "total_score": 2, "total_questions": 3, "sessions_played": 0, "best_streak": 1,
+        "last_celebration_streak": 10,
+    }
+
+
+def test_loads_include_pending_deltas_of_cached_users(store, backend):
+    backend.update("alice", {"total_questions": 5})
+    assert store.load("alice")["total_questions"] == 5
+    store.update("alice", {"total_questions": 1})
+    assert store.load("alice")["total_questions"] == 6
+    store.flush()
+    assert store.load("alice")["total_questions"] == 6
+    assert store.cache_misses == 1
+
+
+def test_close_flushes_pending_deltas(backend):
+    store = WriteBehindStatsStore(backend, max_pending=10**6, flush_interval=3600)
+    store.update("alice", {"total_questions": 1})
+    store.save_cards("alice", {("Scapula", 1): (2.5, 1.0, 1, 0.0)})
+    store.close()
+    assert backend.load("alice")["total_questions"] == 1
+    assert backend.load_cards("alice") == {("Scapula", 1): (2.5, 1.0, 1, 0.0)}
+
+
+def test_failed_write_is_retried_before_newer_deltas(store, backend):
+    store.update("alice", {"total_questions": 1, "last_celebration_streak": 5})
+    backend.failures = 1
+    store.flush()
+    assert backend.load("alice") == empty_stats()
+    # The cache must not count the failed delta twice
+    assert store.load("alice")["total_questions"] == 1
+
+    store.update("alice", {"total_questions": 1, "last_celebration_streak": 10})
+    store.flush()
+    stats = backend.load("alice")
+    assert stats["total_questions"] == 2
+    assert stats["last_celebration_streak"] == 10
+    assert store.load("alice")["total_questions"] == 2
+
+
+def test_reset_drops_pending_deltas(store, backend):
+    backend.update("alice", {"total_questions": 3})
+    store.update("alice", {"total_questions": 1})
+    store.reset("alice")
+    store.flush()
+    assert backend.load("alice") == empty_stats()
+    assert store.load("alice") == empty_stats()
+
+
+def test_totals_count_pending_new_users(store, backend):
+    backend.update("alice", {"total_questions": 2, "best_streak": 2})
+    assert store.totals()["users"] == 1
+    store.update("alice", {"total_questions": 1})
+    store.update("bob", {"total_questions": 1, "best_streak": 3})
+    totals = store.totals()
+    assert (totals["users"], totals["total_questions"], totals["best_streak"]) == (2, 4, 3)
+    store.flush()
+    assert store.totals() == backend.totals()
+
+
+def test_stores_sharing_a_sqlite_file_lose_no_update(tmp_path, monkeypatch):
+    monkeypatch.setattr("stats_store.VERSION_CHECK_INTERVAL", 0)
+    path = str(tmp_path / "stats.db")
+    stores = [WriteBehindStatsStore(SQLiteStatsStore(path), max_pending=7, flush_interval=0.01) for _ in range(2)]
+
+    def answer(store):
+        for i in range(200):
+            store.update(f"user{i % 3}", {"total_score": i % 2, "total_questions": 1})
+
+    threads = [threading.Thread(target=answer, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    first, second = stores
+    first.flush()
+    second.flush()
+    # Each store sees the other's writes once its data version check notices them
+    for store in stores:
+        totals = store.totals()
+        assert (totals["total_questions"], totals["total_score"], totals["users"]) == (400, 200, 3)
+        assert sum(store.load(f"user{i}")["total_questions"] for i in range(3)) == 400
+    for store in stores:
+        store.close()
+    reader = SQLiteStatsStore(path)
+    assert reader.totals()["total_questions"] == 400
+    reader.close()